@@ -9,16 +9,46 @@ API_CONFIG = {
     # 限流配置
     "demo_delay": 3,            # 演示脚本中每个测试用例之间的延迟（秒）
     "batch_delay": 1,           # 批量操作中每个操作之间的延迟（秒）
+    "demo_concurrency": 2,      # 演示脚本中并发执行的最大请求数
+    "batch_concurrency": 10,    # process_batch 并发执行的最大请求数
+    "requests_per_second": 2,   # 所有 LLM 调用共享的主动限流速率，设为 None 关闭
+    "max_burst": 5,             # 限流令牌桶容量（允许的瞬时突发请求数，启动时桶是满的）
 }
 
 # LLM 配置
 LLM_CONFIG = {
     "temperature": 0,           # 温度参数
     "timeout": 60,              # 超时时间（秒）
+    "response_cache_size": 256, # LLM 响应缓存的最大条目数
+    "max_connections": 40,      # 共享 HTTP 连接池的最大连接数
+    "max_keepalive_connections": 20,  # 保持活动的最大空闲连接数
+    "prompt_cache_control": False,    # 系统提示附加 cache_control 标记（Anthropic 或支持显式提示缓存的网关）
+    "max_history_messages": 40, # 发送给 LLM 的最近对话消息数上限（0 表示不截取）
+}
+
+# 缓存配置
+CACHE_CONFIG = {
+    "tool_result_ttl": 60,      # 只读工具结果的缓存时间（秒）
+    "tool_result_maxsize": 1024,  # 工具结果缓存的最大条目数
+    "summary_tool_ttl": 600,    # 统计分析类工具结果的缓存时间（秒），事件写操作（包括其他进程的）后立即失效
+    "summary_result_ttl": 60,     # SummaryAgent 分析结果的缓存时间（秒），与提示词的分钟粒度一致
+    "summary_result_maxsize": 128,  # SummaryAgent 分析结果缓存的最大条目数
 }
 
 # 数据库配置
 DB_CONFIG = {
     "db_dir": "./data",
     "db_name": "scheduler.db",
+    # 每个新连接建立时执行的 SQLite PRAGMA
+    "pragmas": {
+        "journal_mode": "WAL",      # 写入时不阻塞并发读取
+        "synchronous": "NORMAL",    # WAL 模式下安全且减少 fsync
+        "temp_store": "MEMORY",
+        "cache_size": -64000,       # 约 64MB 页缓存
+        "mmap_size": 268435456,     # 256MB 内存映射
+    },
+    # 连接池大小：并发执行的工具调用各自占用一个连接，WAL 模式下读取可并行
+    "pool_size": 10,
+    "max_overflow": 20,
+    "yield_per": 500,           # 列表查询每批构造的 ORM 对象数
 }
@@ -1,5 +1,6 @@
 """PlanningAgent 演示脚本"""
 import os
+import sys
 import time
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
@@ -8,6 +9,8 @@ from datetime import datetime, timedelta
 load_dotenv()
 
 from src.storage.database import init_db
+from src.utils.retry_helper import wait_remaining
+from config import API_CONFIG
 from src.agents.planning import PlanningAgentRunner
 
 
@@ -49,20 +52,26 @@ def main():
     print("="*60)
 
     for i, test_input in enumerate(test_cases, 1):
-        print(f"\n\n{'='*60}")
-        print(f"演示 {i}/{len(test_cases)}")
-        print(f"{'='*60}")
+        # 每个阶段的输出合并为一次写入
+        sys.stdout.write(f"\n\n{'='*60}\n演示 {i}/{len(test_cases)}\n{'='*60}\n")
+        sys.stdout.flush()
         
+        started = time.monotonic()
         result = agent.process(test_input)
         
-        print(f"\n📊 最终结果:")
-        print(f"   状态: {result['status']}")
-        print(f"   响应: {result['response']}")
+        sys.stdout.write(
+            f"\n📊 最终结果:\n"
+            f"   状态: {result['status']}\n"
+            f"   响应: {result['response']}\n"
+        )
+        sys.stdout.flush()
         
         if i < len(test_cases):
-            print("\n⏸️  等待 3 秒避免 API 限流...")
-            time.sleep(3)
-            input("按 Enter 继续下一个演示...")
+            # 只补足与上一个请求开始时刻之间的间隔，避免 API 限流
+            wait_remaining(started, API_CONFIG["demo_delay"])
+            # 演示用例之间有先后依赖（如冲突检测），保持顺序执行
+            if "--interactive" in sys.argv:
+                input("按 Enter 继续下一个演示...")
 
     print("\n\n" + "="*60)
     print("✅ 演示完成")
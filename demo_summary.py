@@ -1,6 +1,11 @@
-"""SummaryAgent 演示脚本 - 自动运行测试用例"""
+"""SummaryAgent 演示脚本 - 自动运行测试用例
+
+分析类请求互不依赖（只读），默认并发执行；加 --interactive 参数则逐个演示。
+"""
 import os
+import sys
 import time
+import asyncio
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
 
@@ -9,6 +14,9 @@ load_dotenv()
 
 from src.storage.database import init_db
 from src.agents.summary import SummaryAgentRunner
+from src.utils.retry_helper import wait_remaining
+from src.utils.llm import aclose_loop_connections
+from config import API_CONFIG
 
 
 
@@ -41,25 +49,63 @@ def main():
     print("开始演示 SummaryAgent")
     print("="*60)
 
+    if "--interactive" in sys.argv:
+        run_interactive(agent, test_cases)
+    else:
+        results = asyncio.run(run_concurrently(agent, test_cases))
+        for i, result in enumerate(results, 1):
+            print_result(i, len(test_cases), test_cases[i - 1], result)
+
+    print("\n\n" + "="*60)
+    print("✅ 演示完成")
+    print("="*60)
+
+
+def print_result(i, total, test_input, result):
+    """打印单个演示结果（合并为一次写入）"""
+    sys.stdout.write(
+        f"\n\n{'='*60}\n"
+        f"演示 {i}/{total}: {test_input}\n"
+        f"{'='*60}\n"
+        f"\n📊 最终结果:\n"
+        f"   状态: {result['status']}\n"
+        f"   响应: {result['response']}\n"
+    )
+    sys.stdout.flush()
+
+
+def run_interactive(agent, test_cases):
+    """逐个执行测试用例（每个用例之间等待用户确认）"""
     for i, test_input in enumerate(test_cases, 1):
-        print(f"\n\n{'='*60}")
-        print(f"演示 {i}/{len(test_cases)}")
-        print(f"{'='*60}")
-        
+        started = time.monotonic()
         result = agent.process(test_input)
-        
-        print(f"\n📊 最终结果:")
-        print(f"   状态: {result['status']}")
-        print(f"   响应: {result['response']}")
+        print_result(i, len(test_cases), test_input, result)
         
         if i < len(test_cases):
-            print("\n⏸️  等待 3 秒避免 API 限流...")
-            time.sleep(3)
+            # 只补足与上一个请求开始时刻之间的间隔，避免 API 限流
+            wait_remaining(started, API_CONFIG["demo_delay"])
             input("按 Enter 继续下一个演示...")
 
-    print("\n\n" + "="*60)
-    print("✅ 演示完成")
-    print("="*60)
+
+async def run_concurrently(agent, test_cases):
+    """并发执行测试用例
+    
+    用信号量限制同时进行的请求数，每个请求结束后仍占用名额
+    batch_delay 秒，以控制整体请求速率、避免 API 限流。
+    """
+    semaphore = asyncio.Semaphore(API_CONFIG["demo_concurrency"])
+    
+    async def run_one(test_input):
+        async with semaphore:
+            result = await agent.aprocess(test_input)
+            await asyncio.sleep(API_CONFIG["batch_delay"])
+            return result
+    
+    try:
+        return await asyncio.gather(*(run_one(tc) for tc in test_cases))
+    finally:
+        # 事件循环结束前关闭本次建立的 LLM 连接
+        await aclose_loop_connections()
 
 
 if __name__ == "__main__":
@@ -6,8 +6,6 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from src.storage.database import init_db
-from src.agents.scheduler import SchedulerAgentRunner
-from src.agents.summary import SummaryAgentRunner
 
 
 def main():
@@ -47,6 +45,8 @@ def run_scheduler_agent():
     print("🤖 启动 SchedulerAgent - 日程管理助手")
     print("="*60)
     
+    # 只导入所选的 Agent，缩短启动时间
+    from src.agents.scheduler import SchedulerAgentRunner
     agent = SchedulerAgentRunner()
     
     print("\n可以尝试的命令：")
@@ -70,9 +70,15 @@ def run_scheduler_agent():
                 print("\n👋 再见！")
                 break
             
-            conversation_state = agent.agent.graph.invoke({
-                "messages": conversation_state["messages"] + [HumanMessage(content=user_input)]
-            })
+            # 原地追加新消息，避免每轮复制整个历史列表
+            history = conversation_state["messages"]
+            history.append(HumanMessage(content=user_input))
+            try:
+                conversation_state = agent.agent.graph.invoke(conversation_state)
+            except Exception:
+                # 执行失败时撤回本轮输入，历史中不留下没有回复的消息
+                history.pop()
+                raise
             
             final_message = conversation_state["messages"][-1]
             print(f"\n🤖 Agent: {final_message.content}")
@@ -90,6 +96,8 @@ def run_summary_agent():
     print("📊 启动 SummaryAgent - 日程分析助手")
     print("="*60)
     
+    # 只导入所选的 Agent，缩短启动时间
+    from src.agents.summary import SummaryAgentRunner
     agent = SummaryAgentRunner()
     
     print("\n可以尝试的命令：")
@@ -113,9 +121,15 @@ def run_summary_agent():
                 print("\n👋 再见！")
                 break
             
-            conversation_state = agent.agent.graph.invoke({
-                "messages": conversation_state["messages"] + [HumanMessage(content=user_input)]
-            })
+            # 原地追加新消息，避免每轮复制整个历史列表
+            history = conversation_state["messages"]
+            history.append(HumanMessage(content=user_input))
+            try:
+                conversation_state = agent.agent.graph.invoke(conversation_state)
+            except Exception:
+                # 执行失败时撤回本轮输入，历史中不留下没有回复的消息
+                history.pop()
+                raise
             
             final_message = conversation_state["messages"][-1]
             print(f"\n📊 Agent: {final_message.content}")
@@ -1,5 +1,6 @@
 """PlanningAgent 交互式入口文件（主控）"""
 import os
+import asyncio
 from dotenv import load_dotenv
 
 # 加载环境变量
@@ -7,6 +8,23 @@ load_dotenv()
 
 from src.storage.database import init_db
 from src.agents.planning import PlanningAgentRunner
+from src.utils.streaming import astream_reply
+from src.utils.llm import aclose_loop_connections
+
+
+async def stream_turn(agent, conversation_state: dict) -> dict:
+    """流式执行一轮对话，边生成边打印回复，返回新的对话状态"""
+    printed_header = False
+    async for item in astream_reply(agent.agent.graph, conversation_state):
+        if isinstance(item, dict):
+            conversation_state = item
+            continue
+        if not printed_header:
+            print("\n🧠 Agent: ", end="", flush=True)
+            printed_header = True
+        print(item, end="", flush=True)
+    print()
+    return conversation_state
 
 
 def main():
@@ -41,32 +59,44 @@ def main():
     from langchain_core.messages import HumanMessage
     conversation_state = {"messages": []}
 
+    # 整个会话复用同一个事件循环，异步 HTTP 连接池中的连接可以跨轮复用
+    loop = asyncio.new_event_loop()
+
     # 交互循环
-    while True:
-        try:
-            user_input = input("\n👤 你: ").strip()
-            
-            if not user_input:
-                continue
-            
-            if user_input.lower() in ['quit', 'exit', '退出']:
-                print("\n👋 再见！")
-                break
-            
-            # 将新消息添加到状态中
-            conversation_state = agent.agent.graph.invoke({
-                "messages": conversation_state["messages"] + [HumanMessage(content=user_input)]
-            })
-            
-            # 显示结果
-            final_message = conversation_state["messages"][-1]
-            print(f"\n🧠 Agent: {final_message.content}")
+    try:
+        while True:
+            try:
+                user_input = input("\n👤 你: ").strip()
                 
-        except KeyboardInterrupt:
-            print("\n\n👋 再见！")
-            break
-        except Exception as e:
-            print(f"\n❌ 发生错误: {str(e)}")
+                if not user_input:
+                    continue
+                
+                if user_input.lower() in ['quit', 'exit', '退出']:
+                    print("\n👋 再见！")
+                    break
+                
+                # 将新消息原地追加到历史中，避免每轮复制整个列表
+                history = conversation_state["messages"]
+                history.append(HumanMessage(content=user_input))
+                try:
+                    # 异步流式执行：同一轮中多个子 Agent 调用可并发执行，回复边生成边显示
+                    conversation_state = loop.run_until_complete(
+                        stream_turn(agent, conversation_state)
+                    )
+                except Exception:
+                    # 执行失败时撤回本轮输入，历史中不留下没有回复的消息
+                    history.pop()
+                    raise
+                
+            except KeyboardInterrupt:
+                print("\n\n👋 再见！")
+                break
+            except Exception as e:
+                print(f"\n❌ 发生错误: {str(e)}")
+    finally:
+        # 关闭本会话建立的 LLM 连接后再关闭事件循环
+        loop.run_until_complete(aclose_loop_connections())
+        loop.close()
 
 
 if __name__ == "__main__":
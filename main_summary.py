@@ -49,11 +49,16 @@ def main():
                 print("\n👋 再见！")
                 break
             
-            # 将新消息添加到状态中
+            # 将新消息原地追加到历史中，避免每轮复制整个列表
             # add_messages 注解会自动合并消息列表
-            conversation_state = agent.agent.graph.invoke({
-                "messages": conversation_state["messages"] + [HumanMessage(content=user_input)]
-            })
+            history = conversation_state["messages"]
+            history.append(HumanMessage(content=user_input))
+            try:
+                conversation_state = agent.agent.graph.invoke(conversation_state)
+            except Exception:
+                # 执行失败时撤回本轮输入，历史中不留下没有回复的消息
+                history.pop()
+                raise
             
             # 显示结果
             final_message = conversation_state["messages"][-1]
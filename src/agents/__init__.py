@@ -1,10 +1,36 @@
-"""Agent 模块"""
-from .scheduler import SchedulerAgent, SchedulerAgentRunner, create_scheduler_graph
-from .summary import SummaryAgent, SummaryAgentRunner, create_summary_graph
-from .planning import PlanningAgent, PlanningAgentRunner, create_planning_graph
+"""Agent 模块
+
+各 Agent 在首次访问时才导入（PEP 562），只使用其中一个 Agent 时
+不必加载其余 Agent 的模块。
+"""
+import importlib
+
+# 名称 -> 所在子模块
+_LAZY_IMPORTS = {
+    "SchedulerAgent": ".scheduler",
+    "SchedulerAgentRunner": ".scheduler",
+    "create_scheduler_graph": ".scheduler",
+    "get_scheduler_agent": ".scheduler",
+    "SummaryAgent": ".summary",
+    "SummaryAgentRunner": ".summary",
+    "create_summary_graph": ".summary",
+    "get_summary_agent": ".summary",
+    "PlanningAgent": ".planning",
+    "PlanningAgentRunner": ".planning",
+    "create_planning_graph": ".planning",
+    "get_planning_agent": ".planning",
+}
 
 __all__ = [
-    "SchedulerAgent", "SchedulerAgentRunner", "create_scheduler_graph",
-    "SummaryAgent", "SummaryAgentRunner", "create_summary_graph",
-    "PlanningAgent", "PlanningAgentRunner", "create_planning_graph"
+    "SchedulerAgent", "SchedulerAgentRunner", "create_scheduler_graph", "get_scheduler_agent",
+    "SummaryAgent", "SummaryAgentRunner", "create_summary_graph", "get_summary_agent",
+    "PlanningAgent", "PlanningAgentRunner", "create_planning_graph", "get_planning_agent"
 ]
+
+
+def __getattr__(name):
+    """按需导入 Agent"""
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module_name, __name__), name)
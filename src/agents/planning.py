@@ -1,94 +1,112 @@
 """PlanningAgent - 任务规划智能体（主控）"""
 import os
-from typing import Literal
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, SystemMessage
+import logging
+from functools import lru_cache
+import uuid
+from typing import AsyncIterator, List, Literal, Optional
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import RunnableLambda
 from langchain_core.tools import StructuredTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
 from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolNode
 
 from ..graph.state import AgentState
+from ..utils.llm import load_env, get_llm, trim_history, LLMResponseCache, TimedSystemPrompt
+from ..utils.logger import get_logger
+from ..utils.json_helper import decode_tool_content
+from ..utils.streaming import astream_reply
+from ..utils.batch import aprocess_batch, process_batch
+from config import API_CONFIG, LLM_CONFIG
 from ..tools.planning_agent_tools import (
     call_scheduler_agent,
     call_summary_agent,
+    acall_scheduler_agent,
+    acall_summary_agent,
     store_preference,
     get_preferences,
     clear_preferences,
 )
 
 
-class PlanningAgent:
-    """任务规划 Agent（主控）"""
-    
-    def __init__(self):
-        self.llm = self._create_llm()
-        self.tools = self._build_tools()
-        self.graph = self._build_graph()
-    
-    def _create_llm(self):
-        """创建 LLM"""
-        return ChatOpenAI(
-            model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
-            api_key=os.getenv("OPENAI_API_KEY"),
-            base_url=os.getenv("OPENAI_API_BASE"),
-            temperature=0
-        )
-    
-    def _build_tools(self):
-        """构建工具集"""
-        tools = [
-            StructuredTool.from_function(
-                name="call_scheduler_agent",
-                description="调用日程管理助手（SchedulerAgent）处理日程相关操作。适用于：添加、修改、删除、查询日程事件，查询空闲时间等。将用户的日程管理请求传递给该助手",
-                func=call_scheduler_agent,
-            ),
-            StructuredTool.from_function(
-                name="call_summary_agent",
-                description="调用日程分析助手（SummaryAgent）处理分析和总结请求。适用于：统计事件数据、分析时间使用、生成总结报告、提供优化建议等。将用户的分析请求传递给该助手",
-                func=call_summary_agent,
-            ),
-            StructuredTool.from_function(
-                name="store_preference",
-                description="存储用户的偏好设置。记录用户的习惯、喜好、工作时间偏好等信息，用于后续的智能规划。例如：工作时间偏好、会议时间偏好、休息习惯等",
-                func=store_preference,
-            ),
-            StructuredTool.from_function(
-                name="get_preferences",
-                description="获取用户的偏好设置。查询之前存储的用户偏好信息，用于制定符合用户习惯的日程安排",
-                func=get_preferences,
-            ),
-            StructuredTool.from_function(
-                name="clear_preferences",
-                description="清空所有用户偏好设置。慎用，只在用户明确要求重置偏好时使用",
-                func=clear_preferences,
-            ),
-        ]
-        return tools
+logger = get_logger(__name__)
+
+
+# 意图明确的输入前缀（前两个字） -> 直接委派的工具，命中时跳过首轮 LLM 路由
+FAST_PATH_ROUTES = {
+    "添加": "call_scheduler_agent",
+    "删除": "call_scheduler_agent",
+    "修改": "call_scheduler_agent",
+    "查询": "call_scheduler_agent",
+    "总结": "call_summary_agent",
+    "分析": "call_summary_agent",
+    "统计": "call_summary_agent",
+}
+
+# 含有这些词的请求涉及偏好或规划，需要 LLM 判断，不走快速路径
+FAST_PATH_EXCLUDES = ("偏好", "喜欢", "规划", "计划", "建议")
+
+# 含有这些连接词或分隔符的请求可能包含多个任务，需要 LLM 拆分，不走快速路径
+FAST_PATH_CONJUNCTIONS = ("再", "并", "然后", "同时", "以及", "，", ",", "；", ";")
+
+# 总结分析类请求的常见说法；“查询本周时间使用情况”这类请求虽以“查询”开头，应交给 SummaryAgent
+SUMMARY_INTENT_WORDS = ("时间使用", "分配", "效率", "情况", "多少", "占比", "趋势", "最常")
+
+# 工具 -> 指向其他工具的关键词；输入中出现时意图混合，不走快速路径
+_OTHER_ROUTE_KEYWORDS = {
+    tool_name: tuple(word for word, other in FAST_PATH_ROUTES.items() if other != tool_name)
+    for tool_name in set(FAST_PATH_ROUTES.values())
+}
+_OTHER_ROUTE_KEYWORDS["call_scheduler_agent"] += SUMMARY_INTENT_WORDS
+
+
+# 查看偏好的固定说法：直接读取偏好并格式化回复，全程不调用 LLM
+PREFERENCE_QUERIES = frozenset({
+    "查看偏好", "查看我的偏好", "查看偏好设置", "查看我的偏好设置", "我的偏好", "我的偏好设置",
+})
+
+
+# 返回结果即为面向用户的完整回复的子 Agent 工具
+SUB_AGENT_TOOLS = ("call_scheduler_agent", "call_summary_agent")
+
+
+def match_fast_path(user_input: str) -> Optional[str]:
+    """根据输入前缀匹配可直接委派的工具，无法确定时返回 None
     
-    def _build_graph(self):
-        """构建 LangGraph 图"""
-        # 创建图
-        workflow = StateGraph(AgentState)
-        
-        # 绑定工具到 LLM
-        llm_with_tools = self.llm.bind_tools(self.tools)
-        
-        # 定义节点
-        def agent_node(state: AgentState):
-            """Agent 推理节点"""
-            messages = state["messages"]
-            
-            print("\n" + "="*60)
-            print("🧠 [PlanningAgent 节点] 开始规划...")
-            print(f"📝 当前消息数: {len(messages)}")
-            
-            # 获取当前时间
-            from datetime import datetime
-            current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            current_date = datetime.now().strftime("%Y-%m-%d")
-            
-            # 添加系统提示
-            system_message = SystemMessage(content=f"""您是智能日程管理系统的主控助理（PlanningAgent）。
+    只有单一意图的请求才走快速路径：含有其他工具的关键词（如“查询……统计”、
+    “查询……时间使用情况”）或连接词（如“添加……，再总结……”）时交给 LLM 判断，
+    避免整句只交给一个子 Agent 或交给错误的子 Agent。
+    """
+    if user_input.strip().rstrip("。？?！!") in PREFERENCE_QUERIES:
+        return "get_preferences"
+    tool_name = FAST_PATH_ROUTES.get(user_input.strip()[:2])
+    if tool_name is None:
+        return None
+    if any(word in user_input for word in FAST_PATH_EXCLUDES):
+        return None
+    if any(word in user_input for word in _OTHER_ROUTE_KEYWORDS[tool_name]):
+        return None
+    if any(word in user_input for word in FAST_PATH_CONJUNCTIONS):
+        return None
+    return tool_name
+
+
+def format_preferences(content: dict) -> str:
+    """把 get_preferences 的返回结果格式化为回复文本"""
+    preferences = content.get("preferences") or {}
+    if not preferences:
+        return "您还没有设置任何偏好。可以告诉我您的习惯，例如“我喜欢上午工作，下午开会”。"
+    lines = [f"您目前有 {len(preferences)} 个偏好设置："]
+    for category, item in preferences.items():
+        line = f"- {category}: {item['preference']}"
+        if item.get("description"):
+            line += f"（{item['description']}）"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+# 系统提示模板（仅时间部分随调用变化）
+SYSTEM_PROMPT_TEMPLATE = """您是智能日程管理系统的主控助理（PlanningAgent）。
 
 当前时间: {current_time}
 当前日期: {current_date}
@@ -125,6 +143,7 @@ class PlanningAgent:
    - 分析总结类请求 → 委派给 SummaryAgent
    - 偏好相关请求 → 使用偏好管理工具
    - 复杂规划请求 → 组合使用多个助手
+   - 相互独立的子任务 → 在同一轮中同时发起多个工具调用，系统会并发执行
 
 3. 智能规划能力
    - 在制定日程计划时，先查询用户偏好
@@ -148,6 +167,7 @@ class PlanningAgent:
 
 - "添加明天的会议" → call_scheduler_agent
 - "总结本周日程" → call_summary_agent
+- "添加明天的会议，再总结一下上周" → 同一轮同时调用 call_scheduler_agent 和 call_summary_agent
 - "帮我规划下周的学习计划" → 先 get_preferences，再 call_scheduler_agent
 - "我喜欢上午工作" → store_preference
 - "查看我的偏好" → get_preferences
@@ -157,86 +177,272 @@ class PlanningAgent:
 - 充分利用专业助手的能力
 - 提供有价值的规划建议
 - 确保用户请求得到完整处理
-""")
+"""
+
+
+@lru_cache(maxsize=1)
+def _create_tools() -> tuple:
+    """构建 PlanningAgent 工具集（工具对象无状态，进程内只构建一次并在实例间共享）"""
+    return tuple([
+        StructuredTool.from_function(
+            name="call_scheduler_agent",
+            description="调用日程管理助手（SchedulerAgent）处理日程相关操作。适用于：添加、修改、删除、查询日程事件，查询空闲时间等。将用户的日程管理请求传递给该助手",
+            func=call_scheduler_agent,
+            coroutine=acall_scheduler_agent,
+        ),
+        StructuredTool.from_function(
+            name="call_summary_agent",
+            description="调用日程分析助手（SummaryAgent）处理分析和总结请求。适用于：统计事件数据、分析时间使用、生成总结报告、提供优化建议等。将用户的分析请求传递给该助手",
+            func=call_summary_agent,
+            coroutine=acall_summary_agent,
+        ),
+        StructuredTool.from_function(
+            name="store_preference",
+            description="存储用户的偏好设置。记录用户的习惯、喜好、工作时间偏好等信息，用于后续的智能规划。例如：工作时间偏好、会议时间偏好、休息习惯等",
+            func=store_preference,
+        ),
+        StructuredTool.from_function(
+            name="get_preferences",
+            description="获取用户的偏好设置。查询之前存储的用户偏好信息，用于制定符合用户习惯的日程安排",
+            func=get_preferences,
+        ),
+        StructuredTool.from_function(
+            name="clear_preferences",
+            description="清空所有用户偏好设置。慎用，只在用户明确要求重置偏好时使用",
+            func=clear_preferences,
+        ),
+    ])
+
+
+@lru_cache(maxsize=1)
+def _tool_schemas() -> tuple:
+    """工具的函数调用 schema（只生成一次，避免每次绑定时重复反射签名）"""
+    return tuple(convert_to_openai_tool(tool) for tool in _create_tools())
+
+
+class PlanningAgent:
+    """任务规划 Agent（主控）"""
+    
+    def __init__(self):
+        self._system_prompt = TimedSystemPrompt(SYSTEM_PROMPT_TEMPLATE)
+        self._response_cache = LLMResponseCache(LLM_CONFIG["response_cache_size"])
+        self.llm = self._create_llm()
+        self.tools = self._build_tools()
+        # 绑定工具的 LLM 和工具执行节点（内含工具名到工具的映射）只构建一次
+        self.llm_with_tools = self.llm.bind_tools(list(_tool_schemas()))
+        self.tool_executor = ToolNode(self.tools)
+        self.graph = self._build_graph()
+    
+    def _create_llm(self):
+        """创建 LLM"""
+        load_env()
+        return get_llm(
+            model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
+            api_key=os.getenv("OPENAI_API_KEY"),
+            base_url=os.getenv("OPENAI_API_BASE"),
+            temperature=0
+        )
+    
+    def _build_tools(self):
+        """构建工具集"""
+        return list(_create_tools())
+    
+    def _build_graph(self):
+        """构建 LangGraph 图"""
+        # 创建图
+        workflow = StateGraph(AgentState)
+        
+        llm_with_tools = self.llm_with_tools
+        # 输入完全相同时复用缓存的响应，限流时自动重试
+        response_cache = self._response_cache
+        
+        # 定义节点
+        def fast_path_response(state: AgentState):
+            """快速路径：对话的第一条输入意图明确时直接委派，省去一次 LLM 调用
             
-            # 调用 LLM
-            print("💭 正在调用 LLM...")
-            response = llm_with_tools.invoke([system_message] + list(messages))
+            有历史时输入可能指代上文，仍交给 LLM 改写请求；查看偏好的固定说法不依赖上文，
+            任何一轮都可直接处理。未命中时返回 None。
+            """
+            messages = state["messages"]
+            if not messages or not isinstance(messages[-1], HumanMessage):
+                return None
             
-            # 打印 Agent 的决策
+            user_input = messages[-1].content
+            tool_name = match_fast_path(user_input)
+            if not tool_name or (len(messages) != 1 and tool_name != "get_preferences"):
+                return None
+            
+            logger.info("\n" + "="*60)
+            logger.info("⚡ [PlanningAgent 节点] 快速路径: 直接调用 %s", tool_name)
+            args = {} if tool_name == "get_preferences" else {"request": user_input}
+            return {"messages": [AIMessage(
+                content="",
+                tool_calls=[{
+                    "name": tool_name,
+                    "args": args,
+                    "id": f"call_fastpath_{uuid.uuid4().hex}",
+                }]
+            )]}
+        
+        def prepare_messages(state: AgentState):
+            """准备发送给 LLM 的消息（系统提示 + 对话历史）"""
+            messages = state["messages"]
+            
+            logger.info("\n" + "="*60)
+            logger.info("🧠 [PlanningAgent 节点] 开始规划...")
+            logger.debug("📝 当前消息数: %d", len(messages))
+            
+            # 添加系统提示（同一分钟内复用同一个 SystemMessage）
+            system_message = self._system_prompt.get()
+            
+            # 调用 LLM
+            logger.debug("💭 正在调用 LLM...")
+            # 单次分配构造输入列表；只发送最近的对话历史，长会话的每轮输入保持有界
+            return [system_message, *trim_history(messages)]
+        
+        def handle_response(response):
+            """打印 Agent 的决策并返回状态更新"""
             if hasattr(response, "tool_calls") and response.tool_calls:
-                print(f"🔧 Agent 决定调用 {len(response.tool_calls)} 个工具:")
+                logger.info("🔧 Agent 决定调用 %d 个工具:", len(response.tool_calls))
                 for tool_call in response.tool_calls:
-                    print(f"   - {tool_call['name']}: {tool_call['args']}")
+                    logger.debug("   - %s: %s", tool_call['name'], tool_call['args'])
             else:
-                print("✅ Agent 决定结束任务")
-                print(f"💬 最终回复: {response.content[:100]}...")
+                logger.info("✅ Agent 决定结束任务")
+                logger.debug("💬 最终回复: %.100s...", response.content)
             
             return {"messages": [response]}
         
+        def agent_node(state: AgentState):
+            """Agent 推理节点"""
+            fast_path = fast_path_response(state)
+            if fast_path:
+                return fast_path
+            return handle_response(response_cache.cached_invoke(llm_with_tools, prepare_messages(state)))
+        
+        async def aagent_node(state: AgentState):
+            """Agent 推理节点（异步）"""
+            fast_path = fast_path_response(state)
+            if fast_path:
+                return fast_path
+            return handle_response(await response_cache.acached_invoke(llm_with_tools, prepare_messages(state)))
+        
         # 定义工具节点（包装以添加日志）
-        original_tool_node = ToolNode(self.tools)
+        # 同步执行时 ToolNode 用线程池并发执行多个工具调用，
+        # 异步执行时用 asyncio.gather 并发执行
+        original_tool_node = self.tool_executor
         
-        def tool_node(state: AgentState):
-            """工具执行节点（带日志）"""
-            print("\n" + "-"*60)
-            print("🔧 [工具节点] 开始执行工具...")
+        def log_tool_calls(state: AgentState):
+            """打印即将执行的工具"""
+            logger.info("\n" + "-"*60)
+            logger.info("🔧 [工具节点] 开始执行工具...")
             
             # 获取要执行的工具
             last_message = state["messages"][-1]
             if hasattr(last_message, "tool_calls"):
                 for tool_call in last_message.tool_calls:
-                    print(f"⚙️  执行工具: {tool_call['name']}")
-            
-            # 执行工具
-            result = original_tool_node.invoke(state)
-            
-            # 打印工具返回结果
+                    logger.info("⚙️  执行工具: %s", tool_call['name'])
+        
+        def log_tool_results(result: dict):
+            """打印工具返回结果"""
+            # 日志关闭时跳过 JSON 解析
+            if not logger.isEnabledFor(logging.INFO):
+                return
             tool_messages = result["messages"]
             for msg in tool_messages:
-                if hasattr(msg, "content"):
-                    import json
-                    try:
-                        content = json.loads(msg.content) if isinstance(msg.content, str) else msg.content
-                        status = content.get("status", "unknown")
-                        agent = content.get("agent", "")
-                        
-                        if status == "success":
-                            if agent:
-                                print(f"✅ {agent} 执行成功")
-                            else:
-                                print(f"✅ 工具执行成功")
-                        elif status == "error":
-                            message = content.get("message", "")
-                            print(f"❌ 工具执行失败: {message}")
-                        else:
-                            print(f"📄 工具返回: {str(msg.content)[:100]}...")
-                    except:
-                        print(f"📄 工具返回: {str(msg.content)[:100]}...")
+                content = decode_tool_content(getattr(msg, "content", None))
+                if content is None:
+                    logger.debug("📄 工具返回: %.100s...", getattr(msg, "content", ""))
+                    continue
+                
+                status = content.get("status", "unknown")
+                agent = content.get("agent", "")
+                
+                if status == "success":
+                    if agent:
+                        logger.info("✅ %s 执行成功", agent)
+                    else:
+                        logger.info("✅ 工具执行成功")
+                elif status == "error":
+                    message = content.get("message", "")
+                    logger.info("❌ 工具执行失败: %s", message)
+                else:
+                    logger.debug("📄 工具返回: %.100s...", msg.content)
+        
+        def pass_through_reply(state: AgentState, result: dict) -> Optional[AIMessage]:
+            """子 Agent 已完整处理用户请求时，直接用它的回复作为最终回复
             
+            仅当本轮只调用了一个子 Agent、委派的请求就是用户的原始输入、
+            且子 Agent 执行成功时生效，省去一次只是转述结果的 LLM 调用。
+            多步规划（委派的是改写或拆分后的请求）仍回到 agent 节点。
+            快速路径发起的偏好查询同样直接回复。
+            """
+            tool_calls = getattr(state["messages"][-1], "tool_calls", None)
+            if not tool_calls or len(tool_calls) != 1:
+                return None
+            
+            # 快速路径发起的偏好查询：直接格式化结果
+            if tool_calls[0]["name"] == "get_preferences" and tool_calls[0]["id"].startswith("call_fastpath_"):
+                content = decode_tool_content(getattr(result["messages"][-1], "content", None))
+                if not content or content.get("status") != "success":
+                    return None
+                logger.info("⚡ [PlanningAgent] 偏好查询直接回复，跳过 LLM")
+                return AIMessage(content=format_preferences(content))
+            
+            if tool_calls[0]["name"] not in SUB_AGENT_TOOLS:
+                return None
+            
+            user_input = next(
+                (msg.content for msg in reversed(state["messages"]) if isinstance(msg, HumanMessage)),
+                None
+            )
+            if tool_calls[0]["args"].get("request") != user_input:
+                return None
+            
+            content = decode_tool_content(getattr(result["messages"][-1], "content", None))
+            if not content or content.get("status") != "success" or not content.get("response"):
+                return None
+            
+            logger.info("⚡ [PlanningAgent] 直接采用 %s 的回复，跳过转述", content.get("agent", ""))
+            return AIMessage(content=content["response"])
+        
+        def finish_tools(state: AgentState, result: dict) -> dict:
+            """打印工具结果，必要时追加直通回复"""
+            log_tool_results(result)
+            reply = pass_through_reply(state, result)
+            if reply is not None:
+                result = {"messages": [*result["messages"], reply]}
             return result
         
+        def tool_node(state: AgentState):
+            """工具执行节点（带日志）"""
+            log_tool_calls(state)
+            return finish_tools(state, original_tool_node.invoke(state))
+        
+        async def atool_node(state: AgentState):
+            """工具执行节点（异步，带日志）"""
+            log_tool_calls(state)
+            return finish_tools(state, await original_tool_node.ainvoke(state))
+        
         # 定义路由函数
         def should_continue(state: AgentState) -> Literal["tools", "end"]:
             """判断是否继续调用工具"""
-            messages = state["messages"]
-            last_message = messages[-1]
-            
-            print("\n" + "~"*60)
-            print("🔀 [路由判断]")
+            # 如果有工具调用则继续，否则结束（Agent 认为任务已完成）
+            route = "tools" if getattr(state["messages"][-1], "tool_calls", None) else "end"
             
-            # 如果有工具调用，继续
-            if hasattr(last_message, "tool_calls") and last_message.tool_calls:
-                print("➡️  路由到: tools (执行工具)")
-                return "tools"
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("\n" + "~"*60)
+                logger.debug("🔀 [路由判断]")
+                logger.debug("➡️  路由到: %s", "tools (执行工具)" if route == "tools" else "end (任务完成)")
             
-            # 否则结束（Agent 认为任务已完成）
-            print("➡️  路由到: end (任务完成)")
-            return "end"
+            return route
+        
+        def after_tools(state: AgentState) -> Literal["agent", "end"]:
+            """工具执行后：已追加直通回复则结束，否则回到 agent"""
+            return "end" if isinstance(state["messages"][-1], AIMessage) else "agent"
         
         # 添加节点
-        workflow.add_node("agent", agent_node)
-        workflow.add_node("tools", tool_node)
+        workflow.add_node("agent", RunnableLambda(agent_node, afunc=aagent_node))
+        workflow.add_node("tools", RunnableLambda(tool_node, afunc=atool_node))
         
         # 设置入口
         workflow.set_entry_point("agent")
@@ -251,8 +457,15 @@ class PlanningAgent:
             }
         )
         
-        # 工具执行后返回 agent
-        workflow.add_edge("tools", "agent")
+        # 工具执行后返回 agent（子 Agent 回复直通时直接结束）
+        workflow.add_conditional_edges(
+            "tools",
+            after_tools,
+            {
+                "agent": "agent",
+                "end": END
+            }
+        )
         
         # 编译图
         return workflow.compile()
@@ -260,53 +473,127 @@ class PlanningAgent:
     def process(self, user_input: str) -> dict:
         """处理用户输入"""
         try:
-            print("\n" + "="*60)
-            print("🚀 [PlanningAgent] 开始处理请求")
-            print(f"👤 用户输入: {user_input}")
-            print("="*60)
-            
-            # 创建初始状态
-            initial_state = {
-                "messages": [HumanMessage(content=user_input)]
-            }
+            self._log_start(user_input)
             
             # 执行图
-            result = self.graph.invoke(initial_state)
+            result = self.graph.invoke(self._initial_state(user_input))
             
-            # 提取最终响应
-            final_message = result["messages"][-1]
+            return self._build_response(result)
+        except Exception as e:
+            return self._build_error(e)
+    
+    async def aprocess(self, user_input: str) -> dict:
+        """异步处理用户输入（多个独立请求可并发执行）"""
+        try:
+            self._log_start(user_input)
             
-            print("\n" + "="*60)
-            print("🎉 [PlanningAgent] 处理完成")
-            print(f"📊 总消息数: {len(result['messages'])}")
-            print(f"💬 最终响应: {final_message.content[:200]}...")
-            print("="*60 + "\n")
+            # 执行图
+            result = await self.graph.ainvoke(self._initial_state(user_input))
             
-            return {
-                "status": "success",
-                "response": final_message.content,
-                "messages": result["messages"]
-            }
+            return self._build_response(result)
         except Exception as e:
-            print(f"\n❌ [错误] {str(e)}\n")
-            return {
-                "status": "error",
-                "response": f"处理请求时出错：{str(e)}"
-            }
+            return self._build_error(e)
+    
+    async def astream(self, user_input: str) -> AsyncIterator[str]:
+        """流式处理用户输入，逐段产出最终回复文本（降低首字延迟）
+        
+        只转发本图 agent 节点的模型输出，工具内部子 Agent 的输出不会转发。
+        """
+        try:
+            self._log_start(user_input)
+            
+            async for item in astream_reply(self.graph, self._initial_state(user_input)):
+                if isinstance(item, dict):
+                    self._build_response(item)
+                else:
+                    yield item
+        except Exception as e:
+            yield self._build_error(e)["response"]
+    
+    def _initial_state(self, user_input: str) -> dict:
+        """创建初始状态"""
+        return {
+            "messages": [HumanMessage(content=user_input)]
+        }
+    
+    def _log_start(self, user_input: str):
+        """打印请求开始信息"""
+        logger.info("\n" + "="*60)
+        logger.info("🚀 [PlanningAgent] 开始处理请求")
+        logger.info("👤 用户输入: %s", user_input)
+        logger.info("="*60)
+    
+    def _build_response(self, result: dict) -> dict:
+        """从图执行结果中提取最终响应"""
+        final_message = result["messages"][-1]
+        
+        logger.info("\n" + "="*60)
+        logger.info("🎉 [PlanningAgent] 处理完成")
+        logger.info("📊 总消息数: %d", len(result["messages"]))
+        logger.info("💬 最终响应: %.200s...", final_message.content)
+        logger.info("="*60 + "\n")
+        
+        return {
+            "status": "success",
+            "response": final_message.content,
+            "messages": result["messages"]
+        }
+    
+    def _build_error(self, e: Exception) -> dict:
+        """构建错误响应"""
+        logger.error("\n❌ [错误] %s\n", e)
+        return {
+            "status": "error",
+            "response": f"处理请求时出错：{str(e)}"
+        }
+
+
+@lru_cache(maxsize=1)
+def get_planning_agent() -> PlanningAgent:
+    """获取共享的 PlanningAgent 实例
+    
+    PlanningAgentRunner 和 create_planning_graph 共用这个实例；
+    子 Agent 在第一次被工具调用时才创建。
+    """
+    return PlanningAgent()
 
 
 class PlanningAgentRunner:
     """PlanningAgent 运行器（简化接口）"""
     
     def __init__(self):
-        self.agent = PlanningAgent()
+        self.agent = get_planning_agent()
     
     def process(self, user_input: str) -> dict:
         """处理用户输入"""
         return self.agent.process(user_input)
+    
+    async def aprocess(self, user_input: str) -> dict:
+        """异步处理用户输入"""
+        return await self.agent.aprocess(user_input)
+    
+    async def astream(self, user_input: str) -> AsyncIterator[str]:
+        """流式处理用户输入"""
+        async for chunk in self.agent.astream(user_input):
+            yield chunk
+    
+    async def aprocess_batch(
+        self,
+        inputs: List[str],
+        max_concurrency: int = API_CONFIG["batch_concurrency"]
+    ) -> List[dict]:
+        """并发处理多个相互独立的请求，结果顺序与 inputs 一致"""
+        return await aprocess_batch(self.agent.aprocess, inputs, max_concurrency)
+    
+    def process_batch(
+        self,
+        inputs: List[str],
+        max_concurrency: int = API_CONFIG["batch_concurrency"]
+    ) -> List[dict]:
+        """并发处理多个相互独立的请求（同步接口）"""
+        return process_batch(self.agent.aprocess, inputs, max_concurrency)
 
 
 def create_planning_graph():
-    """创建 PlanningAgent 图（工厂函数）"""
-    agent = PlanningAgent()
-    return agent.graph
+    """获取 PlanningAgent 图（共享的已编译图）"""
+    return get_planning_agent().graph
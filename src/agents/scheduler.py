@@ -1,13 +1,21 @@
 """SchedulerAgent - 日程管理智能体"""
 import os
-from typing import Literal
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, SystemMessage
+import logging
+from functools import lru_cache
+from typing import AsyncIterator, List, Literal
+from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableLambda
 from langchain_core.tools import StructuredTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
 from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolNode
-from dotenv import load_dotenv, find_dotenv
 from ..graph.state import AgentState
+from ..utils.llm import load_env, get_llm, trim_history, LLMResponseCache, TimedSystemPrompt
+from ..utils.logger import get_logger
+from ..utils.json_helper import decode_tool_content
+from ..utils.streaming import astream_reply
+from ..utils.batch import aprocess_batch, process_batch
+from config import API_CONFIG, LLM_CONFIG
 from ..tools.scheduler_agent_tools import (
     add_event,
     update_event,
@@ -17,88 +25,10 @@ from ..tools.scheduler_agent_tools import (
     get_free_slots,
 )
 
-load_dotenv()
+logger = get_logger(__name__)
 
-model_name = os.getenv("MODEL_NAME")
-api_key = os.getenv("API_KEY")
-base_url = os.getenv("BASE_URL")
-
-class SchedulerAgent:
-    """日程管理 Agent"""
-    
-    def __init__(self):
-        self.llm = self._create_llm()
-        self.tools = self._build_tools()
-        self.graph = self._build_graph()
-    
-    def _create_llm(self):
-        """创建 LLM"""
-        return ChatOpenAI(
-        temperature=0,
-        model=model_name,
-        api_key=api_key,
-        base_url=base_url)
-    
-    def _build_tools(self):
-        """构建工具集"""
-        tools = [
-            StructuredTool.from_function(
-                name="add_event",
-                description="添加日程事件。自动检测时间冲突，如有冲突会返回错误。需要提供标题、开始时间、结束时间，可选描述、地点、标签。如需强制添加（忽略冲突），设置 force=True",
-                func=add_event,
-            ),
-            StructuredTool.from_function(
-                name="update_event",
-                description="更新日程事件。自动检测时间冲突，如有冲突会返回错误。需要提供事件ID和要更新的字段。如需强制更新（忽略冲突），设置 force=True",
-                func=update_event,
-            ),
-            StructuredTool.from_function(
-                name="remove_event",
-                description="删除日程事件。需要提供事件ID",
-                func=remove_event,
-            ),
-            StructuredTool.from_function(
-                name="get_event",
-                description="查询单个日程事件的详细信息。需要提供事件ID",
-                func=get_event,
-            ),
-            StructuredTool.from_function(
-                name="list_events",
-                description="列出日程事件列表。可以按日期范围和状态筛选",
-                func=list_events,
-            ),
-            StructuredTool.from_function(
-                name="get_free_slots",
-                description="查询指定日期的空闲时间段。需要提供日期，可选最小时长",
-                func=get_free_slots,
-            ),
-        ]
-        return tools
-    
-    def _build_graph(self):
-        """构建 LangGraph 图"""
-        # 创建图
-        workflow = StateGraph(AgentState)
-        
-        # 绑定工具到 LLM
-        llm_with_tools = self.llm.bind_tools(self.tools)
-        
-        # 定义节点
-        def agent_node(state: AgentState):
-            """Agent 推理节点"""
-            messages = state["messages"]
-            
-            print("\n" + "="*60)
-            print("🤖 [Agent 节点] 开始推理...")
-            print(f"📝 当前消息数: {len(messages)}")
-            
-            # 获取当前时间
-            from datetime import datetime
-            current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            current_date = datetime.now().strftime("%Y-%m-%d")
-            
-            # 添加系统提示
-            system_message = SystemMessage(content=f"""您是专门处理日程管理的助理。
+# 系统提示模板（仅时间部分随调用变化）
+SYSTEM_PROMPT_TEMPLATE = """您是专门处理日程管理的助理。
 
 当前时间: {current_time}
 当前日期: {current_date}
@@ -135,61 +65,177 @@ class SchedulerAgent:
    - 支持多种时间格式，包括相对时间（明天、下周）和绝对时间
 
 请记住，只有在相关工具成功执行后（status="success"），任务才算完成。
-""")
+"""
+
+
+@lru_cache(maxsize=1)
+def _create_tools() -> tuple:
+    """构建 SchedulerAgent 工具集（工具对象无状态，进程内只构建一次并在实例间共享）"""
+    return tuple([
+        StructuredTool.from_function(
+            name="add_event",
+            description="添加日程事件。自动检测时间冲突，如有冲突会返回错误。需要提供标题、开始时间、结束时间，可选描述、地点、标签。如需强制添加（忽略冲突），设置 force=True",
+            func=add_event,
+        ),
+        StructuredTool.from_function(
+            name="update_event",
+            description="更新日程事件。自动检测时间冲突，如有冲突会返回错误。需要提供事件ID和要更新的字段。如需强制更新（忽略冲突），设置 force=True",
+            func=update_event,
+        ),
+        StructuredTool.from_function(
+            name="remove_event",
+            description="删除日程事件。需要提供事件ID",
+            func=remove_event,
+        ),
+        StructuredTool.from_function(
+            name="get_event",
+            description="查询单个日程事件的详细信息。需要提供事件ID",
+            func=get_event,
+        ),
+        StructuredTool.from_function(
+            name="list_events",
+            description="列出日程事件列表。可以按日期范围和状态筛选",
+            func=list_events,
+        ),
+        StructuredTool.from_function(
+            name="get_free_slots",
+            description="查询指定日期的空闲时间段。需要提供日期，可选最小时长",
+            func=get_free_slots,
+        ),
+    ])
+
+
+@lru_cache(maxsize=1)
+def _tool_schemas() -> tuple:
+    """工具的函数调用 schema（只生成一次，避免每次绑定时重复反射签名）"""
+    return tuple(convert_to_openai_tool(tool) for tool in _create_tools())
+
+
+class SchedulerAgent:
+    """日程管理 Agent"""
+    
+    def __init__(self):
+        self._system_prompt = TimedSystemPrompt(SYSTEM_PROMPT_TEMPLATE)
+        self._response_cache = LLMResponseCache(LLM_CONFIG["response_cache_size"])
+        self.llm = self._create_llm()
+        self.tools = self._build_tools()
+        # 绑定工具的 LLM 和工具执行节点（内含工具名到工具的映射）只构建一次
+        self.llm_with_tools = self.llm.bind_tools(list(_tool_schemas()))
+        self.tool_executor = ToolNode(self.tools)
+        self.graph = self._build_graph()
+    
+    def _create_llm(self):
+        """创建 LLM"""
+        load_env()
+        return get_llm(
+            model=os.getenv("MODEL_NAME"),
+            api_key=os.getenv("API_KEY"),
+            base_url=os.getenv("BASE_URL"),
+            temperature=0
+        )
+    
+    def _build_tools(self):
+        """构建工具集"""
+        return list(_create_tools())
+    
+    def _build_graph(self):
+        """构建 LangGraph 图"""
+        # 创建图
+        workflow = StateGraph(AgentState)
+        
+        llm_with_tools = self.llm_with_tools
+        # 输入完全相同时复用缓存的响应，限流时自动重试
+        response_cache = self._response_cache
+        
+        # 定义节点
+        def prepare_messages(state: AgentState):
+            """准备发送给 LLM 的消息（系统提示 + 对话历史）"""
+            messages = state["messages"]
             
-            # 调用 LLM
-            print("💭 正在调用 LLM...")
-            response = llm_with_tools.invoke([system_message] + list(messages))
+            logger.info("\n" + "="*60)
+            logger.info("🤖 [Agent 节点] 开始推理...")
+            logger.debug("📝 当前消息数: %d", len(messages))
+            
+            # 添加系统提示（同一分钟内复用同一个 SystemMessage）
+            system_message = self._system_prompt.get()
             
-            # 打印 Agent 的决策
+            # 调用 LLM
+            logger.debug("💭 正在调用 LLM...")
+            # 单次分配构造输入列表；只发送最近的对话历史，长会话的每轮输入保持有界
+            return [system_message, *trim_history(messages)]
+        
+        def handle_response(response):
+            """打印 Agent 的决策并返回状态更新"""
             if hasattr(response, "tool_calls") and response.tool_calls:
-                print(f"🔧 Agent 决定调用 {len(response.tool_calls)} 个工具:")
+                logger.info("🔧 Agent 决定调用 %d 个工具:", len(response.tool_calls))
                 for tool_call in response.tool_calls:
-                    print(f"   - {tool_call['name']}: {tool_call['args']}")
+                    logger.debug("   - %s: %s", tool_call['name'], tool_call['args'])
             else:
-                print("✅ Agent 决定结束任务")
-                print(f"💬 最终回复: {response.content[:100]}...")
+                logger.info("✅ Agent 决定结束任务")
+                logger.debug("💬 最终回复: %.100s...", response.content)
             
             return {"messages": [response]}
         
+        def agent_node(state: AgentState):
+            """Agent 推理节点"""
+            return handle_response(response_cache.cached_invoke(llm_with_tools, prepare_messages(state)))
+        
+        async def aagent_node(state: AgentState):
+            """Agent 推理节点（异步）"""
+            return handle_response(await response_cache.acached_invoke(llm_with_tools, prepare_messages(state)))
+        
         # 定义工具节点（包装以添加日志）
-        original_tool_node = ToolNode(self.tools)
+        # 同步执行时 ToolNode 用线程池并发执行多个工具调用，
+        # 异步执行时用 asyncio.gather 并发执行
+        original_tool_node = self.tool_executor
         
-        def tool_node(state: AgentState):
-            """工具执行节点（带日志）"""
-            print("\n" + "-"*60)
-            print("🔧 [工具节点] 开始执行工具...")
+        def log_tool_calls(state: AgentState):
+            """打印即将执行的工具"""
+            logger.info("\n" + "-"*60)
+            logger.info("🔧 [工具节点] 开始执行工具...")
             
             # 获取要执行的工具
             last_message = state["messages"][-1]
             if hasattr(last_message, "tool_calls"):
                 for tool_call in last_message.tool_calls:
-                    print(f"⚙️  执行工具: {tool_call['name']}")
-            
-            # 执行工具
-            result = original_tool_node.invoke(state)
-            
-            # 打印工具返回结果
+                    logger.info("⚙️  执行工具: %s", tool_call['name'])
+        
+        def log_tool_results(result: dict):
+            """打印工具返回结果"""
+            # 日志关闭时跳过 JSON 解析
+            if not logger.isEnabledFor(logging.INFO):
+                return
             tool_messages = result["messages"]
             for msg in tool_messages:
-                if hasattr(msg, "content"):
-                    import json
-                    try:
-                        content = json.loads(msg.content) if isinstance(msg.content, str) else msg.content
-                        status = content.get("status", "unknown")
-                        message = content.get("message", "")
-                        
-                        if status == "success":
-                            print(f"✅ 工具执行成功: {message}")
-                        elif status == "error":
-                            print(f"❌ 工具执行失败: {message}")
-                        elif status == "warning":
-                            print(f"⚠️  工具警告: {message}")
-                        else:
-                            print(f"📄 工具返回: {msg.content[:100]}...")
-                    except:
-                        print(f"📄 工具返回: {str(msg.content)[:100]}...")
-            
+                content = decode_tool_content(getattr(msg, "content", None))
+                if content is None:
+                    logger.debug("📄 工具返回: %.100s...", getattr(msg, "content", ""))
+                    continue
+                
+                status = content.get("status", "unknown")
+                message = content.get("message", "")
+                
+                if status == "success":
+                    logger.info("✅ 工具执行成功: %s", message)
+                elif status == "error":
+                    logger.info("❌ 工具执行失败: %s", message)
+                elif status == "warning":
+                    logger.info("⚠️  工具警告: %s", message)
+                else:
+                    logger.debug("📄 工具返回: %.100s...", msg.content)
+        
+        def tool_node(state: AgentState):
+            """工具执行节点（带日志）"""
+            log_tool_calls(state)
+            result = original_tool_node.invoke(state)
+            log_tool_results(result)
+            return result
+        
+        async def atool_node(state: AgentState):
+            """工具执行节点（异步，带日志）"""
+            log_tool_calls(state)
+            result = await original_tool_node.ainvoke(state)
+            log_tool_results(result)
             return result
         
         # 定义路由函数
@@ -205,24 +251,19 @@ class SchedulerAgent:
             - 是否任务已完成
             - 是否需要向用户反馈
             """
-            messages = state["messages"]
-            last_message = messages[-1]
-            
-            print("\n" + "~"*60)
-            print("🔀 [路由判断]")
+            # 如果有工具调用则继续，否则结束（Agent 认为任务已完成）
+            route = "tools" if getattr(state["messages"][-1], "tool_calls", None) else "end"
             
-            # 如果有工具调用，继续
-            if hasattr(last_message, "tool_calls") and last_message.tool_calls:
-                print("➡️  路由到: tools (执行工具)")
-                return "tools"
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("\n" + "~"*60)
+                logger.debug("🔀 [路由判断]")
+                logger.debug("➡️  路由到: %s", "tools (执行工具)" if route == "tools" else "end (任务完成)")
             
-            # 否则结束（Agent 认为任务已完成）
-            print("➡️  路由到: end (任务完成)")
-            return "end"
+            return route
         
         # 添加节点
-        workflow.add_node("agent", agent_node)
-        workflow.add_node("tools", tool_node)
+        workflow.add_node("agent", RunnableLambda(agent_node, afunc=aagent_node))
+        workflow.add_node("tools", RunnableLambda(tool_node, afunc=atool_node))
         
         # 设置入口
         workflow.set_entry_point("agent")
@@ -246,53 +287,127 @@ class SchedulerAgent:
     def process(self, user_input: str) -> dict:
         """处理用户输入"""
         try:
-            print("\n" + "="*60)
-            print("🚀 [SchedulerAgent] 开始处理请求")
-            print(f"👤 用户输入: {user_input}")
-            print("="*60)
-            
-            # 创建初始状态
-            initial_state = {
-                "messages": [HumanMessage(content=user_input)]
-            }
+            self._log_start(user_input)
             
             # 执行图
-            result = self.graph.invoke(initial_state)
+            result = self.graph.invoke(self._initial_state(user_input))
             
-            # 提取最终响应
-            final_message = result["messages"][-1]
+            return self._build_response(result)
+        except Exception as e:
+            return self._build_error(e)
+    
+    async def aprocess(self, user_input: str) -> dict:
+        """异步处理用户输入（多个独立请求可并发执行）"""
+        try:
+            self._log_start(user_input)
             
-            print("\n" + "="*60)
-            print("🎉 [SchedulerAgent] 处理完成")
-            print(f"📊 总消息数: {len(result['messages'])}")
-            print(f"💬 最终响应: {final_message.content}")
-            print("="*60 + "\n")
+            # 执行图
+            result = await self.graph.ainvoke(self._initial_state(user_input))
             
-            return {
-                "status": "success",
-                "response": final_message.content,
-                "messages": result["messages"]
-            }
+            return self._build_response(result)
         except Exception as e:
-            print(f"\n❌ [错误] {str(e)}\n")
-            return {
-                "status": "error",
-                "response": f"处理请求时出错：{str(e)}"
-            }
+            return self._build_error(e)
+    
+    async def astream(self, user_input: str) -> AsyncIterator[str]:
+        """流式处理用户输入，逐段产出最终回复文本（降低首字延迟）
+        
+        只转发本图 agent 节点的模型输出，工具内部子 Agent 的输出不会转发。
+        """
+        try:
+            self._log_start(user_input)
+            
+            async for item in astream_reply(self.graph, self._initial_state(user_input)):
+                if isinstance(item, dict):
+                    self._build_response(item)
+                else:
+                    yield item
+        except Exception as e:
+            yield self._build_error(e)["response"]
+    
+    def _initial_state(self, user_input: str) -> dict:
+        """创建初始状态"""
+        return {
+            "messages": [HumanMessage(content=user_input)]
+        }
+    
+    def _log_start(self, user_input: str):
+        """打印请求开始信息"""
+        logger.info("\n" + "="*60)
+        logger.info("🚀 [SchedulerAgent] 开始处理请求")
+        logger.info("👤 用户输入: %s", user_input)
+        logger.info("="*60)
+    
+    def _build_response(self, result: dict) -> dict:
+        """从图执行结果中提取最终响应"""
+        final_message = result["messages"][-1]
+        
+        logger.info("\n" + "="*60)
+        logger.info("🎉 [SchedulerAgent] 处理完成")
+        logger.info("📊 总消息数: %d", len(result["messages"]))
+        logger.info("💬 最终响应: %s", final_message.content)
+        logger.info("="*60 + "\n")
+        
+        return {
+            "status": "success",
+            "response": final_message.content,
+            "messages": result["messages"]
+        }
+    
+    def _build_error(self, e: Exception) -> dict:
+        """构建错误响应"""
+        logger.error("\n❌ [错误] %s\n", e)
+        return {
+            "status": "error",
+            "response": f"处理请求时出错：{str(e)}"
+        }
+
+
+@lru_cache(maxsize=1)
+def get_scheduler_agent() -> SchedulerAgent:
+    """获取共享的 SchedulerAgent 实例
+    
+    SchedulerAgentRunner、create_scheduler_graph 和 PlanningAgent 的 call_scheduler_agent
+    工具都通过这里取得同一个实例。图不保存对话状态，可以并发调用。
+    """
+    return SchedulerAgent()
 
 
 class SchedulerAgentRunner:
     """SchedulerAgent 运行器（简化接口）"""
     
     def __init__(self):
-        self.agent = SchedulerAgent()
+        self.agent = get_scheduler_agent()
     
     def process(self, user_input: str) -> dict:
         """处理用户输入"""
         return self.agent.process(user_input)
+    
+    async def aprocess(self, user_input: str) -> dict:
+        """异步处理用户输入"""
+        return await self.agent.aprocess(user_input)
+    
+    async def astream(self, user_input: str) -> AsyncIterator[str]:
+        """流式处理用户输入"""
+        async for chunk in self.agent.astream(user_input):
+            yield chunk
+    
+    async def aprocess_batch(
+        self,
+        inputs: List[str],
+        max_concurrency: int = API_CONFIG["batch_concurrency"]
+    ) -> List[dict]:
+        """并发处理多个相互独立的请求，结果顺序与 inputs 一致"""
+        return await aprocess_batch(self.agent.aprocess, inputs, max_concurrency)
+    
+    def process_batch(
+        self,
+        inputs: List[str],
+        max_concurrency: int = API_CONFIG["batch_concurrency"]
+    ) -> List[dict]:
+        """并发处理多个相互独立的请求（同步接口）"""
+        return process_batch(self.agent.aprocess, inputs, max_concurrency)
 
 
 def create_scheduler_graph():
-    """创建 SchedulerAgent 图（工厂函数）"""
-    agent = SchedulerAgent()
-    return agent.graph
+    """获取 SchedulerAgent 图（共享的已编译图）"""
+    return get_scheduler_agent().graph
@@ -1,86 +1,37 @@
 """SummaryAgent - 总结分析智能体"""
 import os
-from typing import Literal
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, SystemMessage
+import logging
+import time
+from functools import lru_cache
+from typing import AsyncIterator, Literal
+from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 from langchain_core.tools import StructuredTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
 from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolNode
 
 from ..graph.state import AgentState
+from ..utils.llm import load_env, get_llm, build_system_message, trim_history, TimedSystemPrompt
+from ..utils.retry_helper import retry_on_rate_limit
+from ..utils.cache import ToolResultCache
+from ..utils.logger import get_logger
+from ..utils.json_helper import decode_tool_content
+from ..utils.streaming import astream_reply
+from config import API_CONFIG, CACHE_CONFIG
 from ..tools.summary_agent_tools import (
     get_events_summary,
     get_events_detail,
     analyze_time_usage,
 )
-from dotenv import load_dotenv
-load_dotenv()
+from ..tools.scheduler_agent_tools import event_cache
 
-class SummaryAgent:
-    """总结分析 Agent"""
-    
-    def __init__(self):
-        self.llm = self._create_llm()
-        self.tools = self._build_tools()
-        self.graph = self._build_graph()
-    
-    def _create_llm(self):
-        """创建 LLM"""
-        return ChatOpenAI(
-            model=os.getenv("OPENAI_MODEL"),
-            api_key=os.getenv("OPENAI_API_KEY"),
-            base_url=os.getenv("OPENAI_API_BASE"),
-            temperature=0
-        )
-    
-    def _build_tools(self):
-        """构建工具集"""
-        tools = [
-            StructuredTool.from_function(
-                name="get_events_summary",
-                description="获取事件统计摘要。返回指定时间范围内的事件数量、总时长、类型分布、时间段分布等统计信息。适合快速了解整体情况",
-                func=get_events_summary,
-            ),
-            StructuredTool.from_function(
-                name="get_events_detail",
-                description="获取事件详细列表。返回指定时间范围内所有事件的完整信息。适合需要查看具体事件详情时使用",
-                func=get_events_detail,
-            ),
-            StructuredTool.from_function(
-                name="analyze_time_usage",
-                description="分析时间使用情况。计算不同类型活动的时间占比，找出最耗时的活动。适合分析时间分配是否合理",
-                func=analyze_time_usage,
-            ),
-        ]
-        return tools
-    
-    def _build_graph(self):
-        """构建 LangGraph 图"""
-        # 创建图
-        workflow = StateGraph(AgentState)
-        
-        # 绑定工具到 LLM
-        llm_with_tools = self.llm.bind_tools(self.tools)
-        
-        # 定义节点
-        def agent_node(state: AgentState):
-            """Agent 推理节点"""
-            messages = state["messages"]
-            
-            print("\n" + "="*60)
-            print("📊 [SummaryAgent 节点] 开始分析...")
-            print(f"📝 当前消息数: {len(messages)}")
-            
-            # 获取当前时间
-            from datetime import datetime
-            current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            current_date = datetime.now().strftime("%Y-%m-%d")
-            
-            # 添加系统提示
-            system_message = SystemMessage(content=f"""您是专门处理日程总结和分析的助理。
 
-当前时间: {current_time}
-当前日期: {current_date}
+logger = get_logger(__name__)
+
+
+# 系统提示（不含任何变量，作为每次请求逐字节相同的前缀，便于命中服务端的前缀缓存）
+SYSTEM_PROMPT = """您是专门处理日程总结和分析的助理。
 
 您的职责是帮助用户分析和总结他们的日程安排，提供有价值的洞察和建议。
 
@@ -111,93 +62,254 @@ class SummaryAgent:
    - 优化建议：具体的改进方向
 
 5. 时间处理
-   - 基于当前时间 {current_time} 计算相对时间
+   - 基于对话末尾给出的当前时间计算相对时间
    - 支持"本周"、"上周"、"本月"等相对时间表达
    - 默认分析最近一周的数据（如果用户没有指定时间范围）
 
 请记住，您的目标是帮助用户更好地理解和优化他们的时间使用。
-""")
+"""
+
+# 需要多步分析的请求关键词，含有这些词时始终使用主模型
+COMPLEX_KEYWORDS = ("详细", "分析", "对比", "趋势", "建议", "优化", "报告", "规律")
+
+# 不超过该长度且不含上述关键词的请求视为简单查询（如"今天有几件事？"）
+SIMPLE_INPUT_MAX_LENGTH = 20
+
+
+def is_simple_request(user_input: str) -> bool:
+    """判断是否为只需一次查询即可回答的简单请求"""
+    text = user_input.strip()
+    if len(text) > SIMPLE_INPUT_MAX_LENGTH:
+        return False
+    return not any(word in text for word in COMPLEX_KEYWORDS)
+
+
+# 时间上下文（接在系统提示的静态部分之后，静态部分保持为稳定前缀）
+TIME_CONTEXT_TEMPLATE = """当前时间: {current_time}
+当前日期: {current_date}"""
+
+
+@lru_cache(maxsize=1)
+def _create_tools() -> tuple:
+    """构建 SummaryAgent 工具集（工具对象无状态，进程内只构建一次并在实例间共享）"""
+    return tuple([
+        StructuredTool.from_function(
+            name="get_events_summary",
+            description="获取事件统计摘要。返回指定时间范围内的事件数量、总时长、类型分布、时间段分布等统计信息。适合快速了解整体情况",
+            func=get_events_summary,
+        ),
+        StructuredTool.from_function(
+            name="get_events_detail",
+            description="获取事件详细列表。返回指定时间范围内所有事件的完整信息。适合需要查看具体事件详情时使用",
+            func=get_events_detail,
+        ),
+        StructuredTool.from_function(
+            name="analyze_time_usage",
+            description="分析时间使用情况。计算不同类型活动的时间占比，找出最耗时的活动。适合分析时间分配是否合理",
+            func=analyze_time_usage,
+        ),
+    ])
+
+
+@lru_cache(maxsize=1)
+def _tool_schemas() -> tuple:
+    """工具的函数调用 schema（只生成一次，避免每次绑定时重复反射签名）"""
+    return tuple(convert_to_openai_tool(tool) for tool in _create_tools())
+
+
+class SummaryAgent:
+    """总结分析 Agent"""
+    
+    def __init__(self):
+        # 时间上下文放在唯一的系统消息末尾：不少 OpenAI 兼容后端只接受位于开头的系统消息
+        self._system_prompt = TimedSystemPrompt(
+            TIME_CONTEXT_TEMPLATE,
+            build=lambda time_context: build_system_message(SYSTEM_PROMPT, suffix=time_context)
+        )
+        # 分析结果缓存：同一分钟内重复的分析请求直接返回上次结果
+        self._result_cache = ToolResultCache(
+            ttl=CACHE_CONFIG["summary_result_ttl"],
+            maxsize=CACHE_CONFIG["summary_result_maxsize"]
+        )
+        self.llm = self._create_llm()
+        self.tools = self._build_tools()
+        # 绑定工具的 LLM 和工具执行节点（内含工具名到工具的映射）只构建一次
+        self.llm_with_tools = self.llm.bind_tools(list(_tool_schemas()))
+        # 简单查询使用的轻量模型（设置 OPENAI_LIGHT_MODEL 时启用）
+        light_llm = self._create_light_llm()
+        self.light_llm_with_tools = (
+            light_llm.bind_tools(list(_tool_schemas())) if light_llm is not None else None
+        )
+        self.tool_executor = ToolNode(self.tools)
+        self.graph = self._build_graph()
+    
+    def _create_llm(self):
+        """创建 LLM"""
+        load_env()
+        return get_llm(
+            model=os.getenv("OPENAI_MODEL"),
+            api_key=os.getenv("OPENAI_API_KEY"),
+            base_url=os.getenv("OPENAI_API_BASE"),
+            temperature=0
+        )
+    
+    def _create_light_llm(self):
+        """创建轻量 LLM（未配置 OPENAI_LIGHT_MODEL 时返回 None）"""
+        load_env()
+        light_model = os.getenv("OPENAI_LIGHT_MODEL")
+        if not light_model:
+            return None
+        return get_llm(
+            model=light_model,
+            api_key=os.getenv("OPENAI_API_KEY"),
+            base_url=os.getenv("OPENAI_API_BASE"),
+            temperature=0
+        )
+    
+    def _build_tools(self):
+        """构建工具集"""
+        return list(_create_tools())
+    
+    def _build_graph(self):
+        """构建 LangGraph 图"""
+        # 创建图
+        workflow = StateGraph(AgentState)
+        
+        llm_with_tools = self.llm_with_tools
+        
+        # LLM 调用遇到限流时按指数退避自动重试
+        retry = retry_on_rate_limit(
+            max_retries=API_CONFIG["max_retries"],
+            delay=API_CONFIG["retry_delay"]
+        )
+        # 是否使用轻量模型 -> (同步调用, 异步调用)
+        invokers = {False: (retry(llm_with_tools.invoke), retry(llm_with_tools.ainvoke))}
+        if self.light_llm_with_tools is not None:
+            invokers[True] = (
+                retry(self.light_llm_with_tools.invoke),
+                retry(self.light_llm_with_tools.ainvoke)
+            )
+        
+        def select_invokers(config: RunnableConfig):
+            """根据本次运行的配置选择主模型或轻量模型"""
+            light_model = config.get("configurable", {}).get("light_model", False)
+            return invokers.get(light_model, invokers[False])
+        
+        # 定义节点
+        def prepare_messages(state: AgentState):
+            """准备发送给 LLM 的消息（带时间上下文的系统提示 + 对话历史）"""
+            messages = state["messages"]
             
-            # 调用 LLM
-            print("💭 正在调用 LLM...")
-            response = llm_with_tools.invoke([system_message] + list(messages))
+            logger.info("\n" + "="*60)
+            logger.info("📊 [SummaryAgent 节点] 开始分析...")
+            logger.debug("📝 当前消息数: %d", len(messages))
             
-            # 打印 Agent 的决策
+            # 同一分钟内复用同一个 SystemMessage，静态提示在最前
+            system_message = self._system_prompt.get()
+            
+            # 调用 LLM
+            logger.debug("💭 正在调用 LLM...")
+            # 只发送最近的对话历史，长会话的每轮输入保持有界
+            return [system_message, *trim_history(messages)]
+        
+        def handle_response(response):
+            """打印 Agent 的决策并返回状态更新"""
             if hasattr(response, "tool_calls") and response.tool_calls:
-                print(f"🔧 Agent 决定调用 {len(response.tool_calls)} 个工具:")
+                logger.info("🔧 Agent 决定调用 %d 个工具:", len(response.tool_calls))
                 for tool_call in response.tool_calls:
-                    print(f"   - {tool_call['name']}: {tool_call['args']}")
+                    logger.debug("   - %s: %s", tool_call['name'], tool_call['args'])
             else:
-                print("✅ Agent 决定结束任务")
-                print(f"💬 最终回复: {response.content[:100]}...")
+                logger.info("✅ Agent 决定结束任务")
+                logger.debug("💬 最终回复: %.100s...", response.content)
             
             return {"messages": [response]}
         
+        def agent_node(state: AgentState, config: RunnableConfig):
+            """Agent 推理节点"""
+            invoke_llm, _ = select_invokers(config)
+            return handle_response(invoke_llm(prepare_messages(state)))
+        
+        async def aagent_node(state: AgentState, config: RunnableConfig):
+            """Agent 推理节点（异步）"""
+            _, ainvoke_llm = select_invokers(config)
+            return handle_response(await ainvoke_llm(prepare_messages(state)))
+        
         # 定义工具节点（包装以添加日志）
-        original_tool_node = ToolNode(self.tools)
+        # 同一轮的多个工具调用（如同时统计摘要和分析时间占比）并发执行：
+        # 同步执行时 ToolNode 用线程池，异步执行时用 asyncio.gather
+        original_tool_node = self.tool_executor
         
-        def tool_node(state: AgentState):
-            """工具执行节点（带日志）"""
-            print("\n" + "-"*60)
-            print("🔧 [工具节点] 开始执行工具...")
+        def log_tool_results(tool_messages):
+            """打印工具返回结果"""
+            for msg in tool_messages:
+                content = decode_tool_content(getattr(msg, "content", None))
+                if content is None:
+                    logger.debug("📄 工具返回: %.100s...", getattr(msg, "content", ""))
+                    continue
+                
+                status = content.get("status", "unknown")
+                
+                if status == "success":
+                    # 打印关键统计信息
+                    if "total_count" in content:
+                        logger.info("✅ 统计完成: 共 %s 个事件", content["total_count"])
+                    elif "count" in content:
+                        logger.info("✅ 查询完成: 找到 %s 个事件", content["count"])
+                    else:
+                        logger.info("✅ 工具执行成功")
+                elif status == "error":
+                    logger.info("❌ 工具执行失败: %s", content.get("message", ""))
+                else:
+                    logger.debug("📄 工具返回: %.100s...", msg.content)
+        
+        def log_tool_calls(state: AgentState):
+            """打印即将执行的工具"""
+            logger.info("\n" + "-"*60)
+            logger.info("🔧 [工具节点] 开始执行工具...")
             
             # 获取要执行的工具
             last_message = state["messages"][-1]
             if hasattr(last_message, "tool_calls"):
                 for tool_call in last_message.tool_calls:
-                    print(f"⚙️  执行工具: {tool_call['name']}")
-            
-            # 执行工具
+                    logger.info("⚙️  执行工具: %s", tool_call['name'])
+        
+        def tool_node(state: AgentState):
+            """工具执行节点（带日志）"""
+            log_tool_calls(state)
             result = original_tool_node.invoke(state)
             
-            # 打印工具返回结果
-            tool_messages = result["messages"]
-            for msg in tool_messages:
-                if hasattr(msg, "content"):
-                    import json
-                    try:
-                        content = json.loads(msg.content) if isinstance(msg.content, str) else msg.content
-                        status = content.get("status", "unknown")
-                        
-                        if status == "success":
-                            # 打印关键统计信息
-                            if "total_count" in content:
-                                print(f"✅ 统计完成: 共 {content['total_count']} 个事件")
-                            elif "count" in content:
-                                print(f"✅ 查询完成: 找到 {content['count']} 个事件")
-                            else:
-                                print(f"✅ 工具执行成功")
-                        elif status == "error":
-                            message = content.get("message", "")
-                            print(f"❌ 工具执行失败: {message}")
-                        else:
-                            print(f"📄 工具返回: {str(msg.content)[:100]}...")
-                    except:
-                        print(f"📄 工具返回: {str(msg.content)[:100]}...")
+            # 打印工具返回结果（日志关闭时跳过 JSON 解析）
+            if logger.isEnabledFor(logging.INFO):
+                log_tool_results(result["messages"])
+            
+            return result
+        
+        async def atool_node(state: AgentState):
+            """工具执行节点（异步，带日志）"""
+            log_tool_calls(state)
+            result = await original_tool_node.ainvoke(state)
+            
+            if logger.isEnabledFor(logging.INFO):
+                log_tool_results(result["messages"])
             
             return result
         
         # 定义路由函数
         def should_continue(state: AgentState) -> Literal["tools", "end"]:
             """判断是否继续调用工具"""
-            messages = state["messages"]
-            last_message = messages[-1]
-            
-            print("\n" + "~"*60)
-            print("🔀 [路由判断]")
+            # 如果有工具调用则继续，否则结束（Agent 认为任务已完成）
+            route = "tools" if getattr(state["messages"][-1], "tool_calls", None) else "end"
             
-            # 如果有工具调用，继续
-            if hasattr(last_message, "tool_calls") and last_message.tool_calls:
-                print("➡️  路由到: tools (执行工具)")
-                return "tools"
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("\n" + "~"*60)
+                logger.debug("🔀 [路由判断]")
+                logger.debug("➡️  路由到: %s", "tools (执行工具)" if route == "tools" else "end (任务完成)")
             
-            # 否则结束（Agent 认为任务已完成）
-            print("➡️  路由到: end (任务完成)")
-            return "end"
+            return route
         
         # 添加节点
-        workflow.add_node("agent", agent_node)
-        workflow.add_node("tools", tool_node)
+        workflow.add_node("agent", RunnableLambda(agent_node, afunc=aagent_node))
+        workflow.add_node("tools", RunnableLambda(tool_node, afunc=atool_node))
         
         # 设置入口
         workflow.set_entry_point("agent")
@@ -220,54 +332,160 @@ class SummaryAgent:
     
     def process(self, user_input: str) -> dict:
         """处理用户输入"""
+        key = self._result_cache_key(user_input)
+        cached = self._get_cached_result(key, user_input)
+        if cached is not None:
+            return cached
+        
         try:
-            print("\n" + "="*60)
-            print("🚀 [SummaryAgent] 开始处理请求")
-            print(f"👤 用户输入: {user_input}")
-            print("="*60)
-            
-            # 创建初始状态
-            initial_state = {
-                "messages": [HumanMessage(content=user_input)]
-            }
+            self._log_start(user_input)
             
             # 执行图
-            result = self.graph.invoke(initial_state)
+            result = self.graph.invoke(self._initial_state(user_input), self._run_config(user_input))
             
-            # 提取最终响应
-            final_message = result["messages"][-1]
+            response = self._build_response(result)
+            self._result_cache.put(key, response)
+            return response
+        except Exception as e:
+            return self._build_error(e)
+    
+    async def aprocess(self, user_input: str) -> dict:
+        """异步处理用户输入（多个独立请求可并发执行）"""
+        key = self._result_cache_key(user_input)
+        cached = self._get_cached_result(key, user_input)
+        if cached is not None:
+            return cached
+        
+        try:
+            self._log_start(user_input)
             
-            print("\n" + "="*60)
-            print("🎉 [SummaryAgent] 处理完成")
-            print(f"📊 总消息数: {len(result['messages'])}")
-            print(f"💬 最终响应: {final_message.content[:200]}...")
-            print("="*60 + "\n")
+            # 执行图
+            result = await self.graph.ainvoke(self._initial_state(user_input), self._run_config(user_input))
             
-            return {
-                "status": "success",
-                "response": final_message.content,
-                "messages": result["messages"]
-            }
+            response = self._build_response(result)
+            self._result_cache.put(key, response)
+            return response
         except Exception as e:
-            print(f"\n❌ [错误] {str(e)}\n")
-            return {
-                "status": "error",
-                "response": f"处理请求时出错：{str(e)}"
-            }
+            return self._build_error(e)
+    
+    async def astream(self, user_input: str) -> AsyncIterator[str]:
+        """流式处理用户输入，逐段产出最终回复文本（降低首字延迟）
+        
+        只转发本图 agent 节点的模型输出；命中结果缓存时一次性产出完整回复。
+        """
+        key = self._result_cache_key(user_input)
+        cached = self._get_cached_result(key, user_input)
+        if cached is not None:
+            yield cached["response"]
+            return
+        
+        try:
+            self._log_start(user_input)
+            
+            async for item in astream_reply(self.graph, self._initial_state(user_input), self._run_config(user_input)):
+                if isinstance(item, dict):
+                    response = self._build_response(item)
+                    self._result_cache.put(key, response)
+                else:
+                    yield item
+        except Exception as e:
+            yield self._build_error(e)["response"]
+    
+    def _run_config(self, user_input: str) -> RunnableConfig:
+        """创建本次运行的配置：简单查询且配置了轻量模型时使用轻量模型"""
+        if self.light_llm_with_tools is not None and is_simple_request(user_input):
+            logger.info("⚡ [SummaryAgent] 简单查询，使用轻量模型")
+            return {"configurable": {"light_model": True}}
+        return {}
+    
+    def _result_cache_key(self, user_input: str) -> tuple:
+        """分析结果缓存键：规范化的输入 + 当前分钟 + 事件数据版本号
+        
+        提示词中的当前时间精确到分钟，"今天还剩哪些安排"等请求的结果随之变化，
+        因此只在同一分钟内复用结果。任何事件写操作都会改变数据版本号；
+        其他进程写入同一个数据库文件时，读取版本号时根据文件的修改时间发现并递增。
+        """
+        return (" ".join(user_input.split()), int(time.time() // 60), event_cache.generation)
+    
+    def _get_cached_result(self, key: tuple, user_input: str):
+        """查询分析结果缓存"""
+        cached = self._result_cache.get(key)
+        if cached is not None:
+            logger.info("\n⚡ [SummaryAgent] 命中结果缓存: %s", user_input)
+        return cached
+    
+    def get_cache_stats(self) -> dict:
+        """获取分析结果缓存的命中统计"""
+        return self._result_cache.get_stats()
+    
+    def _initial_state(self, user_input: str) -> dict:
+        """创建初始状态"""
+        return {
+            "messages": [HumanMessage(content=user_input)]
+        }
+    
+    def _log_start(self, user_input: str):
+        """打印请求开始信息"""
+        logger.info("\n" + "="*60)
+        logger.info("🚀 [SummaryAgent] 开始处理请求")
+        logger.info("👤 用户输入: %s", user_input)
+        logger.info("="*60)
+    
+    def _build_response(self, result: dict) -> dict:
+        """从图执行结果中提取最终响应"""
+        final_message = result["messages"][-1]
+        
+        logger.info("\n" + "="*60)
+        logger.info("🎉 [SummaryAgent] 处理完成")
+        logger.info("📊 总消息数: %d", len(result["messages"]))
+        logger.info("💬 最终响应: %.200s...", final_message.content)
+        logger.info("="*60 + "\n")
+        
+        return {
+            "status": "success",
+            "response": final_message.content,
+            "messages": result["messages"]
+        }
+    
+    def _build_error(self, e: Exception) -> dict:
+        """构建错误响应"""
+        logger.error("\n❌ [错误] %s\n", e)
+        return {
+            "status": "error",
+            "response": f"处理请求时出错：{str(e)}"
+        }
+
+
+@lru_cache(maxsize=1)
+def get_summary_agent() -> SummaryAgent:
+    """获取共享的 SummaryAgent 实例
+    
+    SummaryAgentRunner、create_summary_graph 和 PlanningAgent 的 call_summary_agent
+    工具共用这个实例，因此也共用同一个结果缓存。
+    """
+    return SummaryAgent()
 
 
 class SummaryAgentRunner:
     """SummaryAgent 运行器（简化接口）"""
     
     def __init__(self):
-        self.agent = SummaryAgent()
+        self.agent = get_summary_agent()
     
     def process(self, user_input: str) -> dict:
         """处理用户输入"""
         return self.agent.process(user_input)
+    
+    async def aprocess(self, user_input: str) -> dict:
+        """异步处理用户输入"""
+        return await self.agent.aprocess(user_input)
+    
+    async def astream(self, user_input: str) -> AsyncIterator[str]:
+        """流式处理用户输入"""
+        async for chunk in self.agent.astream(user_input):
+            yield chunk
 
 
 def create_summary_graph():
-    """创建 SummaryAgent 图（工厂函数）"""
-    agent = SummaryAgent()
-    return agent.graph
+    """获取 SummaryAgent 图（共享的已编译图）"""
+    return get_summary_agent().graph
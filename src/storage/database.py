@@ -1,27 +1,67 @@
 """数据库连接管理"""
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, Session
 from contextlib import contextmanager
 import os
 
 from .models import Base
+from config import DB_CONFIG
 
 # 数据库路径
-DB_DIR = "./data"
-DB_PATH = os.path.join(DB_DIR, "scheduler.db")
+DB_DIR = DB_CONFIG["db_dir"]
+DB_PATH = os.path.join(DB_DIR, DB_CONFIG["db_name"])
 DATABASE_URL = f"sqlite:///{DB_PATH}"
 
-# 创建引擎
-engine = create_engine(DATABASE_URL, echo=False)
+# 创建引擎（连接由连接池复用，PRAGMA 只需在建立连接时设置一次）
+# 工具可能在线程池中并发执行，连接需要允许跨线程归还和复用
+engine = create_engine(
+    DATABASE_URL,
+    echo=False,
+    connect_args={"check_same_thread": False},
+    pool_size=DB_CONFIG["pool_size"],
+    max_overflow=DB_CONFIG["max_overflow"],
+)
+
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """为新建立的 SQLite 连接设置 PRAGMA（WAL 等）"""
+    cursor = dbapi_connection.cursor()
+    for name, value in DB_CONFIG["pragmas"].items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
 
 # 创建会话工厂
 SessionLocal = sessionmaker(bind=engine)
 
 
+def data_version() -> tuple:
+    """数据库文件的版本标识：数据库文件和 WAL 文件的（修改时间, 大小）
+    
+    任何连接（包括其他进程）提交写入都会改变 WAL 文件，检查点会改变数据库文件，
+    只读查询不会改变两者；两次 stat 调用即可判断缓存的查询结果是否仍然有效。
+    """
+    version = []
+    for path in (DB_PATH, DB_PATH + "-wal"):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            version.append(None)
+        else:
+            version.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(version)
+
+
 def init_db():
     """初始化数据库"""
     os.makedirs(DB_DIR, exist_ok=True)
     Base.metadata.create_all(bind=engine)
+    
+    # create_all 不会为已存在的表补建索引，旧数据库在这里补上
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
 
 
 @contextmanager
@@ -1,5 +1,5 @@
 """数据库模型定义"""
-from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 
@@ -9,6 +9,13 @@ Base = declarative_base()
 class Event(Base):
     """日程事件模型"""
     __tablename__ = "events"
+    __table_args__ = (
+        # 所有查询都按状态等值过滤、按开始时间范围过滤并排序，冲突检测还比较结束时间；
+        # (status, start_time, end_time) 让这些查询走 B-tree 范围扫描而非全表扫描。
+        # 末尾再带上 title（id 即 rowid，索引自带），冲突检测、空闲时间和统计摘要
+        # 只读索引即可得到全部列，不再回表
+        Index("ix_events_status_start_end_title", "status", "start_time", "end_time", "title"),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     title = Column(String(200), nullable=False)
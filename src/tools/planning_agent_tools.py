@@ -2,32 +2,29 @@
 from typing import Dict, Any, Optional
 from datetime import datetime
 
-from ..agents.scheduler import SchedulerAgent
-from ..agents.summary import SummaryAgent
+from ..utils.logger import get_logger
 
 
-# 创建子 Agent 实例（单例模式）
-_scheduler_agent = None
-_summary_agent = None
+logger = get_logger(__name__)
 
 
-def get_scheduler_agent():
-    """获取 SchedulerAgent 实例（单例）"""
-    global _scheduler_agent
-    if _scheduler_agent is None:
-        _scheduler_agent = SchedulerAgent()
-    return _scheduler_agent
-
+# ============ Agent 调用工具 ============
 
-def get_summary_agent():
-    """获取 SummaryAgent 实例（单例）"""
-    global _summary_agent
-    if _summary_agent is None:
-        _summary_agent = SummaryAgent()
-    return _summary_agent
+# 子 Agent 模块在第一次调用时才导入；get_scheduler_agent / get_summary_agent
+# 是各 Agent 模块中与 Runner 共用的单例
 
+def _sub_agent_result(agent_name: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    """把子 Agent 的处理结果整理为工具返回值
+    
+    只保留可 JSON 序列化的字段：子 Agent 的 messages 是消息对象，
+    带上后 ToolNode 序列化失败，只能退回 Python repr。
+    """
+    return {
+        "status": result["status"],
+        "agent": agent_name,
+        "response": result.get("response", "")
+    }
 
-# ============ Agent 调用工具 ============
 
 def call_scheduler_agent(request: str) -> Dict[str, Any]:
     """调用 SchedulerAgent 处理日程管理请求
@@ -39,20 +36,16 @@ def call_scheduler_agent(request: str) -> Dict[str, Any]:
         SchedulerAgent 的处理结果
     """
     try:
-        print(f"\n🔄 [PlanningAgent] 调用 SchedulerAgent")
-        print(f"   请求: {request}")
+        logger.info("\n🔄 [PlanningAgent] 调用 SchedulerAgent")
+        logger.debug("   请求: %s", request)
         
+        from ..agents.scheduler import get_scheduler_agent
         agent = get_scheduler_agent()
         result = agent.process(request)
         
-        print(f"   结果: {result['status']}")
+        logger.debug("   结果: %s", result["status"])
         
-        return {
-            "status": "success",
-            "agent": "SchedulerAgent",
-            "response": result.get("response", ""),
-            "original_result": result
-        }
+        return _sub_agent_result("SchedulerAgent", result)
     except Exception as e:
         return {
             "status": "error",
@@ -71,20 +64,64 @@ def call_summary_agent(request: str) -> Dict[str, Any]:
         SummaryAgent 的处理结果
     """
     try:
-        print(f"\n🔄 [PlanningAgent] 调用 SummaryAgent")
-        print(f"   请求: {request}")
+        logger.info("\n🔄 [PlanningAgent] 调用 SummaryAgent")
+        logger.debug("   请求: %s", request)
         
+        from ..agents.summary import get_summary_agent
         agent = get_summary_agent()
         result = agent.process(request)
         
-        print(f"   结果: {result['status']}")
+        logger.debug("   结果: %s", result["status"])
         
+        return _sub_agent_result("SummaryAgent", result)
+    except Exception as e:
         return {
-            "status": "success",
+            "status": "error",
             "agent": "SummaryAgent",
-            "response": result.get("response", ""),
-            "original_result": result
+            "message": f"调用 SummaryAgent 失败：{str(e)}"
         }
+
+
+async def acall_scheduler_agent(request: str) -> Dict[str, Any]:
+    """调用 SchedulerAgent 处理日程管理请求（异步版本）
+    
+    同一轮中的多个子 Agent 调用可并发执行。参数与返回值同 call_scheduler_agent。
+    """
+    try:
+        logger.info("\n🔄 [PlanningAgent] 调用 SchedulerAgent（异步）")
+        logger.debug("   请求: %s", request)
+        
+        from ..agents.scheduler import get_scheduler_agent
+        agent = get_scheduler_agent()
+        result = await agent.aprocess(request)
+        
+        logger.debug("   结果: %s", result["status"])
+        
+        return _sub_agent_result("SchedulerAgent", result)
+    except Exception as e:
+        return {
+            "status": "error",
+            "agent": "SchedulerAgent",
+            "message": f"调用 SchedulerAgent 失败：{str(e)}"
+        }
+
+
+async def acall_summary_agent(request: str) -> Dict[str, Any]:
+    """调用 SummaryAgent 处理日程分析请求（异步版本）
+    
+    同一轮中的多个子 Agent 调用可并发执行。参数与返回值同 call_summary_agent。
+    """
+    try:
+        logger.info("\n🔄 [PlanningAgent] 调用 SummaryAgent（异步）")
+        logger.debug("   请求: %s", request)
+        
+        from ..agents.summary import get_summary_agent
+        agent = get_summary_agent()
+        result = await agent.aprocess(request)
+        
+        logger.debug("   结果: %s", result["status"])
+        
+        return _sub_agent_result("SummaryAgent", result)
     except Exception as e:
         return {
             "status": "error",
@@ -1,15 +1,44 @@
 """SchedulerAgent 工具集"""
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from itertools import chain
+from typing import Optional, Dict, Any, List
 
-from ..storage.database import get_db
+from ..storage.database import get_db, data_version
 from ..storage.models import Event
+from ..utils.cache import ToolResultCache
+from config import CACHE_CONFIG, DB_CONFIG
+
+
+# 只读查询结果缓存，任何事件写操作完成后清空；
+# 其他进程（如同时运行的 main.py 和演示脚本）写入同一个数据库文件时，下次查询前清空
+event_cache = ToolResultCache(
+    ttl=CACHE_CONFIG["tool_result_ttl"],
+    maxsize=CACHE_CONFIG["tool_result_maxsize"],
+    data_version=data_version
+)
 
 
 # ============ 工具函数 ============
 
 def parse_datetime(dt_str: str) -> datetime:
     """解析时间字符串，支持多种格式"""
+    # 快速路径：支持的格式都是 ISO 8601 的子集，直接用 C 实现的 fromisoformat 解析，
+    # 省去逐个格式 strptime 失败重试。fromisoformat 接受的格式更宽（时区偏移、周日期等），
+    # 只有 YYYY-MM-DD 开头、日期后为空/空格/T、且结果不带时区时才采用，其余交给下面的严格格式
+    if (
+        len(dt_str) in (10, 16, 19)
+        and dt_str[4:5] == "-"
+        and dt_str[7:8] == "-"
+        and dt_str[10:11] in ("", " ", "T")
+    ):
+        try:
+            dt = datetime.fromisoformat(dt_str)
+        except ValueError:
+            pass
+        else:
+            if dt.tzinfo is None:
+                return dt
+    
     # 支持的时间格式
     formats = [
         "%Y-%m-%d %H:%M",           # 2025-10-22 09:00
@@ -31,6 +60,7 @@ def parse_datetime(dt_str: str) -> datetime:
     )
 
 
+@event_cache.invalidates
 def add_event(
     title: str,
     start_time: str,
@@ -48,22 +78,22 @@ def add_event(
         if start_dt >= end_dt:
             return {"status": "error", "message": "开始时间必须早于结束时间"}
         
-        # 自动检测冲突
-        conflicts = _check_conflicts(start_time, end_time)
-        
-        # 如果有冲突且未强制添加，返回冲突信息
-        if conflicts["has_conflict"] and not force:
-            conflict_info = "\n".join([
-                f"  - {c['title']} ({c['start_time']} ~ {c['end_time']})"
-                for c in conflicts["conflicts"]
-            ])
-            return {
-                "status": "error",
-                "message": f"时间冲突！与以下事件重叠：\n{conflict_info}\n如需强制添加，请设置 force=True",
-                "conflicts": conflicts["conflicts"]
-            }
-        
         with get_db() as db:
+            # 自动检测冲突（与写入共用同一个会话）
+            conflicts = _find_conflicts(db, start_dt, end_dt)
+            
+            # 如果有冲突且未强制添加，返回冲突信息
+            if conflicts and not force:
+                conflict_info = "\n".join([
+                    f"  - {c['title']} ({c['start_time']} ~ {c['end_time']})"
+                    for c in conflicts
+                ])
+                return {
+                    "status": "error",
+                    "message": f"时间冲突！与以下事件重叠：\n{conflict_info}\n如需强制添加，请设置 force=True",
+                    "conflicts": conflicts
+                }
+            
             event = Event(
                 title=title,
                 description=description,
@@ -83,15 +113,16 @@ def add_event(
             }
             
             # 如果是强制添加且有冲突，添加警告信息
-            if force and conflicts["has_conflict"]:
-                result["warning"] = f"已强制添加，但与 {len(conflicts['conflicts'])} 个事件存在时间冲突"
-                result["conflicts"] = conflicts["conflicts"]
+            if force and conflicts:
+                result["warning"] = f"已强制添加，但与 {len(conflicts)} 个事件存在时间冲突"
+                result["conflicts"] = conflicts
             
             return result
     except Exception as e:
         return {"status": "error", "message": f"添加事件失败：{str(e)}"}
 
 
+@event_cache.invalidates
 def update_event(
     event_id: int,
     title: Optional[str] = None,
@@ -123,6 +154,7 @@ def update_event(
                 event.status = status
             
             # 更新时间并自动检测冲突
+            conflicts = []
             if start_time or end_time:
                 new_start = parse_datetime(start_time) if start_time else event.start_time
                 new_end = parse_datetime(end_time) if end_time else event.end_time
@@ -131,22 +163,20 @@ def update_event(
                     return {"status": "error", "message": "开始时间必须早于结束时间"}
                 
                 # 自动检测冲突（排除当前事件）
-                conflicts = _check_conflicts(
-                    new_start.strftime("%Y-%m-%d %H:%M"),
-                    new_end.strftime("%Y-%m-%d %H:%M"),
-                    exclude_event_id=event_id
-                )
+                conflicts = _find_conflicts(db, new_start, new_end, exclude_event_id=event_id)
                 
                 # 如果有冲突且未强制更新，返回冲突信息
-                if conflicts["has_conflict"] and not force:
+                if conflicts and not force:
+                    # 拒绝更新：撤销上面已修改的字段，避免退出会话时被提交
+                    db.rollback()
                     conflict_info = "\n".join([
                         f"  - {c['title']} ({c['start_time']} ~ {c['end_time']})"
-                        for c in conflicts["conflicts"]
+                        for c in conflicts
                     ])
                     return {
                         "status": "error",
                         "message": f"时间冲突！与以下事件重叠：\n{conflict_info}\n如需强制更新，请设置 force=True",
-                        "conflicts": conflicts["conflicts"]
+                        "conflicts": conflicts
                     }
                 
                 event.start_time = new_start
@@ -160,22 +190,17 @@ def update_event(
                 "event": event.to_dict()
             }
             
-            # 如果是强制更新且有冲突，添加警告信息
-            if force and (start_time or end_time):
-                conflicts = _check_conflicts(
-                    event.start_time.strftime("%Y-%m-%d %H:%M"),
-                    event.end_time.strftime("%Y-%m-%d %H:%M"),
-                    exclude_event_id=event_id
-                )
-                if conflicts["has_conflict"]:
-                    result["warning"] = f"已强制更新，但与 {len(conflicts['conflicts'])} 个事件存在时间冲突"
-                    result["conflicts"] = conflicts["conflicts"]
+            # 如果是强制更新且有冲突，添加警告信息（复用上面的检测结果）
+            if force and conflicts:
+                result["warning"] = f"已强制更新，但与 {len(conflicts)} 个事件存在时间冲突"
+                result["conflicts"] = conflicts
             
             return result
     except Exception as e:
         return {"status": "error", "message": f"更新事件失败：{str(e)}"}
 
 
+@event_cache.invalidates
 def remove_event(event_id: int) -> Dict[str, Any]:
     """删除事件"""
     try:
@@ -195,6 +220,7 @@ def remove_event(event_id: int) -> Dict[str, Any]:
         return {"status": "error", "message": f"删除事件失败：{str(e)}"}
 
 
+@event_cache.cached
 def get_event(event_id: int) -> Dict[str, Any]:
     """查询单个事件"""
     try:
@@ -211,6 +237,7 @@ def get_event(event_id: int) -> Dict[str, Any]:
         return {"status": "error", "message": f"查询事件失败：{str(e)}"}
 
 
+@event_cache.cached
 def list_events(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
@@ -234,41 +261,44 @@ def list_events(
                 end_dt = parse_datetime(end_date) + timedelta(days=1)
                 query = query.filter(Event.start_time < end_dt)
             
-            events = query.order_by(Event.start_time).all()
+            # 分批取出并逐个转换为字典，不保留整个 ORM 对象列表
+            events = [
+                event.to_dict()
+                for event in query.order_by(Event.start_time).yield_per(DB_CONFIG["yield_per"])
+            ]
             
             return {
                 "status": "success",
                 "count": len(events),
-                "events": [event.to_dict() for event in events]
+                "events": events
             }
     except Exception as e:
         return {"status": "error", "message": f"查询事件列表失败：{str(e)}"}
 
 
+@event_cache.cached
 def get_free_slots(date: str, min_duration: int = 30) -> Dict[str, Any]:
     """查询空闲时间段"""
     try:
         date_dt = parse_datetime(date)
         day_start = date_dt.replace(hour=0, minute=0, second=0, microsecond=0)
-        day_end = day_start + timedelta(days=1)
+        current_time = day_start.replace(hour=8)  # 从早上8点开始
+        end_of_day = day_start.replace(hour=22)  # 到晚上10点
         
         with get_db() as db:
-            # 查询当天的所有事件
-            events = db.query(Event).filter(
+            # 只查询与 8:00-22:00 时段重叠的事件，且只取起止时间两列，不构造 ORM 对象；
+            # 时段外的事件不影响空闲时间，也不会再产生越过 22:00 的空闲段
+            events = db.query(Event.start_time, Event.end_time).filter(
                 Event.status == "active",
-                Event.start_time < day_end,
-                Event.end_time > day_start
-            ).order_by(Event.start_time).all()
+                Event.start_time < end_of_day,
+                Event.end_time > current_time
+            ).order_by(Event.start_time)
             
-            # 计算空闲时间段
+            # 计算空闲时间段：末尾追加一个 22:00 开始的哨兵事件，
+            # 最后一段空闲由同一个循环处理，不再单独重复一遍
             free_slots = []
-            current_time = day_start.replace(hour=8, minute=0)  # 从早上8点开始
-            end_of_day = day_start.replace(hour=22, minute=0)  # 到晚上10点
             
-            for event in events:
-                event_start = max(event.start_time, day_start)
-                event_end = min(event.end_time, day_end)
-                
+            for event_start, event_end in chain(events, ((end_of_day, end_of_day),)):
                 # 如果当前时间到事件开始有空闲
                 if current_time < event_start:
                     duration = int((event_start - current_time).total_seconds() / 60)
@@ -281,16 +311,6 @@ def get_free_slots(date: str, min_duration: int = 30) -> Dict[str, Any]:
                 
                 current_time = max(current_time, event_end)
             
-            # 最后一个时间段
-            if current_time < end_of_day:
-                duration = int((end_of_day - current_time).total_seconds() / 60)
-                if duration >= min_duration:
-                    free_slots.append({
-                        "start": current_time.strftime("%Y-%m-%d %H:%M"),
-                        "end": end_of_day.strftime("%Y-%m-%d %H:%M"),
-                        "duration_minutes": duration
-                    })
-            
             return {
                 "status": "success",
                 "date": date,
@@ -301,36 +321,33 @@ def get_free_slots(date: str, min_duration: int = 30) -> Dict[str, Any]:
         return {"status": "error", "message": f"查询空闲时间失败：{str(e)}"}
 
 
-def _check_conflicts(start_time_str: str, end_time_str: str, exclude_event_id: Optional[int] = None) -> Dict[str, Any]:
-    """内部函数：检测时间冲突"""
-    try:
-        start_time = parse_datetime(start_time_str)
-        end_time = parse_datetime(end_time_str)
-        
-        with get_db() as db:
-            query = db.query(Event).filter(
-                Event.status == "active",
-                Event.start_time < end_time,
-                Event.end_time > start_time
-            )
-            
-            # 排除指定事件
-            if exclude_event_id:
-                query = query.filter(Event.id != exclude_event_id)
-            
-            conflicts = query.all()
-            
-            return {
-                "has_conflict": len(conflicts) > 0,
-                "conflicts": [
-                    {
-                        "id": event.id,
-                        "title": event.title,
-                        "start_time": event.start_time.strftime("%Y-%m-%d %H:%M"),
-                        "end_time": event.end_time.strftime("%Y-%m-%d %H:%M")
-                    }
-                    for event in conflicts
-                ]
-            }
-    except Exception as e:
-        return {"has_conflict": False, "conflicts": [], "error": str(e)}
+def _find_conflicts(
+    db,
+    start_time: datetime,
+    end_time: datetime,
+    exclude_event_id: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """内部函数：在给定会话中查询与时间段重叠的有效事件
+    
+    重叠条件 start < 新结束 且 end > 新开始 直接比较列值，走 (status, start_time, end_time) 索引；
+    只取需要的四列，不构造 ORM 对象。
+    """
+    query = db.query(Event.id, Event.title, Event.start_time, Event.end_time).filter(
+        Event.status == "active",
+        Event.start_time < end_time,
+        Event.end_time > start_time
+    )
+    
+    # 排除指定事件
+    if exclude_event_id is not None:
+        query = query.filter(Event.id != exclude_event_id)
+    
+    return [
+        {
+            "id": row.id,
+            "title": row.title,
+            "start_time": row.start_time.strftime("%Y-%m-%d %H:%M"),
+            "end_time": row.end_time.strftime("%Y-%m-%d %H:%M")
+        }
+        for row in query.order_by(Event.start_time)
+    ]
@@ -1,35 +1,31 @@
 """SummaryAgent 工具集"""
-from datetime import datetime, timedelta
+from datetime import timedelta
 from typing import Optional, Dict, Any
-from collections import defaultdict
+from collections import Counter
+
+from sqlalchemy import func
 
 from ..storage.database import get_db
 from ..storage.models import Event
+from .scheduler_agent_tools import event_cache, parse_datetime
+from config import CACHE_CONFIG, DB_CONFIG
 
 
-# ============ 工具函数 ============
+# 开始小时 -> 时间段（上午、下午、晚上、夜间），避免逐个事件做区间比较
+_HOUR_TO_PERIOD = tuple(
+    "morning" if 6 <= hour < 12
+    else "afternoon" if 12 <= hour < 18
+    else "evening" if 18 <= hour < 22
+    else "night"
+    for hour in range(24)
+)
 
-def parse_datetime(dt_str: str) -> datetime:
-    """解析时间字符串，支持多种格式"""
-    formats = [
-        "%Y-%m-%d %H:%M",
-        "%Y-%m-%dT%H:%M:%S",
-        "%Y-%m-%dT%H:%M",
-        "%Y-%m-%d",
-    ]
-    
-    for fmt in formats:
-        try:
-            return datetime.strptime(dt_str, fmt)
-        except ValueError:
-            continue
-    
-    raise ValueError(
-        f"无法解析时间格式：{dt_str}，"
-        f"支持的格式：YYYY-MM-DD HH:MM, YYYY-MM-DDTHH:MM:SS, YYYY-MM-DD"
-    )
 
+# ============ 工具函数 ============
 
+# 与日程查询工具共用结果缓存，事件写操作（包括其他进程的）后一并失效；
+# 统计结果常被不同会话重复查询，缓存时间更长
+@event_cache.cached(ttl=CACHE_CONFIG["summary_tool_ttl"])
 def get_events_summary(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
@@ -41,7 +37,16 @@ def get_events_summary(
     """
     try:
         with get_db() as db:
-            query = db.query(Event)
+            # 在数据库中按（日期, 小时, 标题）分组聚合，只传回分组行而不是每个事件
+            day = func.date(Event.start_time)
+            hour = func.strftime("%H", Event.start_time)
+            query = db.query(
+                day,
+                hour,
+                Event.title,
+                func.count(),
+                func.sum(func.julianday(Event.end_time) - func.julianday(Event.start_time))
+            )
             
             # 状态筛选
             if status:
@@ -56,9 +61,9 @@ def get_events_summary(
                 end_dt = parse_datetime(end_date) + timedelta(days=1)
                 query = query.filter(Event.start_time < end_dt)
             
-            events = query.all()
+            groups = query.group_by(day, hour, Event.title).order_by(day).all()
             
-            if not events:
+            if not groups:
                 return {
                     "status": "success",
                     "message": "指定时间范围内没有事件",
@@ -70,57 +75,45 @@ def get_events_summary(
                     }
                 }
             
-            # 统计数据
-            total_count = len(events)
-            total_minutes = sum(
-                (event.end_time - event.start_time).total_seconds() / 60
-                for event in events
-            )
-            total_hours = round(total_minutes / 60, 2)
+            # 合并分组结果（一次遍历完成所有分组统计）
+            total_count = 0
+            total_days = 0.0
+            events_by_date = Counter()   # 按日期分组统计
+            events_by_type = Counter()   # 按标题分组统计（事件类型）
+            time_distribution = {"morning": 0, "afternoon": 0, "evening": 0, "night": 0}
             
-            # 按日期分组统计
-            events_by_date = defaultdict(int)
-            for event in events:
-                date_key = event.start_time.strftime("%Y-%m-%d")
-                events_by_date[date_key] += 1
+            for event_day, event_hour, title, count, days in groups:
+                total_count += count
+                total_days += days
+                events_by_date[event_day] += count
+                events_by_type[title] += count
+                time_distribution[_HOUR_TO_PERIOD[int(event_hour)]] += count
             
-            # 按标题分组统计（事件类型）
-            events_by_type = defaultdict(int)
-            for event in events:
-                events_by_type[event.title] += 1
-            
-            # 时间段分布（上午、下午、晚上）
-            time_distribution = {"morning": 0, "afternoon": 0, "evening": 0, "night": 0}
-            for event in events:
-                hour = event.start_time.hour
-                if 6 <= hour < 12:
-                    time_distribution["morning"] += 1
-                elif 12 <= hour < 18:
-                    time_distribution["afternoon"] += 1
-                elif 18 <= hour < 22:
-                    time_distribution["evening"] += 1
-                else:
-                    time_distribution["night"] += 1
+            # julianday 之差以天为单位
+            total_minutes = total_days * 1440
+            total_hours = round(total_minutes / 60, 2)
+            events_by_date = dict(events_by_date)
             
             return {
                 "status": "success",
                 "date_range": {
-                    "start": start_date or events[0].start_time.strftime("%Y-%m-%d"),
-                    "end": end_date or events[-1].start_time.strftime("%Y-%m-%d")
+                    "start": start_date or min(events_by_date),
+                    "end": end_date or max(events_by_date)
                 },
                 "total_count": total_count,
                 "total_hours": total_hours,
                 "average_duration_minutes": round(total_minutes / total_count, 1),
-                "events_by_date": dict(events_by_date),
-                "events_by_type": dict(sorted(events_by_type.items(), key=lambda x: x[1], reverse=True)),
+                "events_by_date": events_by_date,
+                "events_by_type": dict(events_by_type.most_common()),
                 "time_distribution": time_distribution,
-                "busiest_day": max(events_by_date.items(), key=lambda x: x[1]) if events_by_date else None,
-                "most_common_event": max(events_by_type.items(), key=lambda x: x[1]) if events_by_type else None
+                "busiest_day": max(events_by_date.items(), key=lambda x: x[1]),
+                "most_common_event": events_by_type.most_common(1)[0]
             }
     except Exception as e:
         return {"status": "error", "message": f"获取事件摘要失败：{str(e)}"}
 
 
+@event_cache.cached(ttl=CACHE_CONFIG["summary_tool_ttl"])
 def get_events_detail(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
@@ -147,17 +140,22 @@ def get_events_detail(
                 end_dt = parse_datetime(end_date) + timedelta(days=1)
                 query = query.filter(Event.start_time < end_dt)
             
-            events = query.order_by(Event.start_time).all()
+            # 分批取出并逐个转换为字典，不保留整个 ORM 对象列表
+            events = [
+                event.to_dict()
+                for event in query.order_by(Event.start_time).yield_per(DB_CONFIG["yield_per"])
+            ]
             
             return {
                 "status": "success",
                 "count": len(events),
-                "events": [event.to_dict() for event in events]
+                "events": events
             }
     except Exception as e:
         return {"status": "error", "message": f"获取事件详情失败：{str(e)}"}
 
 
+@event_cache.cached(ttl=CACHE_CONFIG["summary_tool_ttl"])
 def analyze_time_usage(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None
@@ -1,4 +1,10 @@
 """工具模块"""
-from .retry_helper import retry_on_rate_limit, add_delay_between_calls
+from .retry_helper import retry_on_rate_limit, add_delay_between_calls, wait_remaining
+from .llm import load_env, get_llm, build_system_message, trim_history, LLMResponseCache, aclose_loop_connections
+from .logger import get_logger
+from .json_helper import decode_tool_content
+from .cache import ToolResultCache
+from .streaming import astream_reply
+from .batch import aprocess_batch, process_batch
 
-__all__ = ["retry_on_rate_limit", "add_delay_between_calls"]
+__all__ = ["retry_on_rate_limit", "add_delay_between_calls", "wait_remaining", "load_env", "get_llm", "build_system_message", "trim_history", "LLMResponseCache", "aclose_loop_connections", "get_logger", "decode_tool_content", "ToolResultCache", "astream_reply", "aprocess_batch", "process_batch"]
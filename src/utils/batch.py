@@ -0,0 +1,49 @@
+"""批量并发处理"""
+import asyncio
+from typing import Awaitable, Callable, List
+
+from config import API_CONFIG
+from .llm import aclose_loop_connections
+
+
+async def aprocess_batch(
+    aprocess: Callable[[str], Awaitable[dict]],
+    inputs: List[str],
+    max_concurrency: int = API_CONFIG["batch_concurrency"]
+) -> List[dict]:
+    """并发处理多个相互独立的请求
+    
+    Args:
+        aprocess: 处理单个请求的协程函数（如 Agent 的 aprocess）
+        inputs: 用户输入列表
+        max_concurrency: 同时执行的最大请求数
+    
+    Returns:
+        处理结果列表，顺序与 inputs 一致
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def run_one(user_input: str) -> dict:
+        async with semaphore:
+            return await aprocess(user_input)
+    
+    return await asyncio.gather(*(run_one(user_input) for user_input in inputs))
+
+
+def process_batch(
+    aprocess: Callable[[str], Awaitable[dict]],
+    inputs: List[str],
+    max_concurrency: int = API_CONFIG["batch_concurrency"]
+) -> List[dict]:
+    """并发处理多个相互独立的请求（同步接口）
+    
+    每次调用都在新的事件循环中执行；共享的异步 HTTP 客户端按事件循环区分连接池，
+    循环结束前关闭本次建立的连接，多次调用不会复用已关闭循环的连接。
+    """
+    async def run() -> List[dict]:
+        try:
+            return await aprocess_batch(aprocess, inputs, max_concurrency)
+        finally:
+            await aclose_loop_connections()
+    
+    return asyncio.run(run())
@@ -0,0 +1,149 @@
+"""缓存辅助工具"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class ToolResultCache:
+    """工具结果缓存（LRU + 过期时间）
+    
+    用于只读工具：相同参数在 ttl 秒内直接返回上次的成功结果。
+    写操作用 invalidates 装饰，执行后清空缓存。
+    返回的结果可能被多次调用共享，调用方不应修改。
+    
+    invalidates 只能感知本进程内的写操作。传入 data_version 时，每次查询缓存前
+    先调用它取得底层数据的版本标识（如数据库文件的修改时间），与上次不同说明
+    有其他进程写入过，缓存随之清空。
+    """
+    
+    def __init__(
+        self,
+        ttl: float = 60,
+        maxsize: int = 1024,
+        data_version: Optional[Callable[[], Hashable]] = None
+    ):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        # 每次清空加一，用于丢弃清空前开始、清空后才返回的查询结果
+        self._generation = 0
+        self._data_version = data_version
+        self._last_data_version = data_version() if data_version else None
+        self._hits = 0
+        self._misses = 0
+    
+    @property
+    def generation(self) -> int:
+        """数据版本号，每次清空（即每次写操作）后加一"""
+        with self._lock:
+            self._check_data_version()
+            return self._generation
+    
+    def _check_data_version(self):
+        """底层数据被其他进程修改过时清空缓存（调用方需持有锁）"""
+        if self._data_version is None:
+            return
+        version = self._data_version()
+        if version != self._last_data_version:
+            self._last_data_version = version
+            self._data.clear()
+            self._generation += 1
+    
+    @staticmethod
+    def _make_key(func, args, kwargs) -> tuple:
+        """根据函数名和参数生成缓存键"""
+        return (
+            func.__qualname__,
+            json.dumps([args, kwargs], sort_keys=True, ensure_ascii=False, default=str),
+        )
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """查询缓存，未命中或已过期时返回 None"""
+        with self._lock:
+            self._check_data_version()
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._data.move_to_end(key)
+                self._hits += 1
+                return entry[1]
+            self._misses += 1
+            return None
+    
+    def put(
+        self,
+        key: Hashable,
+        value: Any,
+        generation: Optional[int] = None,
+        ttl: Optional[float] = None
+    ):
+        """写入缓存
+        
+        Args:
+            generation: 开始计算 value 时的数据版本号；期间缓存被清空过则不写入
+            ttl: 本条目的缓存时间（秒），默认使用 self.ttl
+        """
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def cached(self, func=None, *, ttl: Optional[float] = None):
+        """装饰器：缓存只读工具的成功结果
+        
+        可直接使用 @cache.cached，也可用 @cache.cached(ttl=...) 为该工具单独指定缓存时间。
+        """
+        if func is None:
+            return lambda f: self.cached(f, ttl=ttl)
+        
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = self._make_key(func, args, kwargs)
+            result = self.get(key)
+            if result is not None:
+                return result
+            
+            generation = self._generation
+            result = func(*args, **kwargs)
+            if isinstance(result, dict) and result.get("status") == "success":
+                self.put(key, result, generation, ttl)
+            return result
+        
+        return wrapper
+    
+    def invalidates(self, func):
+        """装饰器：写操作执行完成（事务已提交）后清空缓存"""
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.clear()
+        
+        return wrapper
+    
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._data.clear()
+            self._generation += 1
+            # 本进程的写操作已在这里处理，不必在下次查询时因数据版本变化再清空一次
+            if self._data_version is not None:
+                self._last_data_version = self._data_version()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取命中统计"""
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "size": len(self._data),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / total if total else 0.0,
+            }
@@ -0,0 +1,31 @@
+"""JSON 辅助函数"""
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+import orjson
+
+
+@lru_cache(maxsize=512)
+def _decode_json(content: str) -> Any:
+    """解析 JSON 字符串（按内容缓存，orjson 解析速度是标准库的数倍）"""
+    return orjson.loads(content)
+
+
+def decode_tool_content(content: Any) -> Optional[Dict[str, Any]]:
+    """把工具返回的消息内容解析为字典
+    
+    相同的返回内容（如同一天的 get_free_slots）只解析一次。
+    返回的字典可能被缓存共享，调用方不应修改。
+    
+    Returns:
+        解析得到的字典；内容不是 JSON 对象时返回 None
+    """
+    if isinstance(content, dict):
+        return content
+    if not isinstance(content, str):
+        return None
+    try:
+        data = _decode_json(content)
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
@@ -0,0 +1,296 @@
+"""LLM 客户端管理"""
+import asyncio
+import hashlib
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional, Sequence
+
+# 各 Agent 模块导入的 langgraph 已经通过 langsmith 加载了 httpx，推迟导入并不能节省时间
+import httpx
+import orjson
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+
+from config import API_CONFIG, LLM_CONFIG
+from .logger import get_logger
+from .retry_helper import retry_on_rate_limit
+
+# langchain_openai（连带 openai、tiktoken）导入较慢，推迟到第一次创建 LLM 时
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
+
+
+logger = get_logger(__name__)
+
+# LLM 调用遇到限流或连接错误时按指数退避自动重试
+_retry = retry_on_rate_limit(
+    max_retries=API_CONFIG["max_retries"],
+    delay=API_CONFIG["retry_delay"]
+)
+
+
+@lru_cache(maxsize=1)
+def load_env():
+    """加载 .env 中的环境变量（进程内只读一次文件，首次创建 LLM 前调用）"""
+    from dotenv import load_dotenv
+    load_dotenv()
+
+
+class _LoopLocalTransport(httpx.AsyncBaseTransport):
+    """按事件循环分别维护连接池的异步传输层
+    
+    异步连接绑定在建立它的事件循环上。每次 asyncio.run 都会新建并关闭一个循环，
+    若所有循环共用一个连接池，后续调用会复用已关闭循环的连接而失败
+    （Event loop is closed）。这里按当前运行的循环转发到各自的连接池，
+    循环结束前应调用 aclose_loop_connections() 关闭当前循环的连接。
+    """
+    
+    def __init__(self, limits: httpx.Limits):
+        self._limits = limits
+        self._loop_transports = weakref.WeakKeyDictionary()
+    
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        loop = asyncio.get_running_loop()
+        transport = self._loop_transports.get(loop)
+        if transport is None:
+            transport = httpx.AsyncHTTPTransport(limits=self._limits)
+            self._loop_transports[loop] = transport
+        return await transport.handle_async_request(request)
+    
+    async def aclose(self) -> None:
+        """关闭当前事件循环的连接池（之后的请求会重新建立连接）"""
+        transport = self._loop_transports.pop(asyncio.get_running_loop(), None)
+        if transport is not None:
+            await transport.aclose()
+
+
+def _connection_limits() -> httpx.Limits:
+    """共享连接池的连接数限制"""
+    return httpx.Limits(
+        max_connections=LLM_CONFIG["max_connections"],
+        max_keepalive_connections=LLM_CONFIG["max_keepalive_connections"],
+    )
+
+
+@lru_cache(maxsize=1)
+def _get_async_transport() -> _LoopLocalTransport:
+    """获取共享的异步传输层（按事件循环区分连接池）"""
+    return _LoopLocalTransport(_connection_limits())
+
+
+@lru_cache(maxsize=1)
+def _get_http_clients():
+    """获取共享的 HTTP 客户端（同步、异步各一个）
+    
+    所有 ChatOpenAI 实例共用同一个连接池，即使模型或 API 地址不同，
+    PlanningAgent 调用子 Agent 时也能复用已建立的 keep-alive 连接。
+    异步客户端的连接池按事件循环区分，同一个循环内的调用才共享连接。
+    """
+    return (
+        httpx.Client(limits=_connection_limits()),
+        httpx.AsyncClient(transport=_get_async_transport()),
+    )
+
+
+async def aclose_loop_connections() -> None:
+    """关闭当前事件循环中建立的 LLM 连接
+    
+    在事件循环结束前调用（如 process_batch 结束时、交互式会话退出时），
+    否则连接会随已关闭的循环一起泄漏。共享的客户端本身保持可用。
+    """
+    if _get_async_transport.cache_info().currsize:
+        await _get_async_transport().aclose()
+
+
+@lru_cache(maxsize=1)
+def _get_rate_limiter():
+    """获取共享的主动限流器（令牌桶）
+    
+    并发批量处理时，在发出请求前主动排队，而不是等收到 429 后再退避重试；
+    所有 ChatOpenAI 实例共用一个限流器，总速率不超过配置值。
+    令牌桶创建时是空的，这里预先装满，交互式使用时的前几次调用不必等待。
+    """
+    if not API_CONFIG["requests_per_second"]:
+        return None
+    
+    from langchain_core.rate_limiters import InMemoryRateLimiter
+    
+    limiter = InMemoryRateLimiter(
+        requests_per_second=API_CONFIG["requests_per_second"],
+        max_bucket_size=API_CONFIG["max_burst"],
+    )
+    limiter.available_tokens = limiter.max_bucket_size
+    return limiter
+
+
+@lru_cache(maxsize=8)
+def get_llm(
+    model: Optional[str] = None,
+    api_key: Optional[str] = None,
+    base_url: Optional[str] = None,
+    temperature: float = 0,
+) -> "ChatOpenAI":
+    """获取 ChatOpenAI 实例（按配置缓存的单例）
+    
+    相同配置的 Agent 共享同一个客户端，所有客户端共享同一个 HTTP 连接池和限流器，
+    避免每次创建 Agent 都重新建立 TCP/TLS 连接。
+    """
+    from langchain_openai import ChatOpenAI
+    
+    http_client, http_async_client = _get_http_clients()
+    return ChatOpenAI(
+        model=model,
+        api_key=api_key,
+        base_url=base_url,
+        temperature=temperature,
+        http_client=http_client,
+        http_async_client=http_async_client,
+        rate_limiter=_get_rate_limiter(),
+        # 重试统一由 retry_on_rate_limit 负责，关闭 openai SDK 自带的重试
+        max_retries=0,
+    )
+
+
+def build_system_message(text: str, suffix: Optional[str] = None) -> SystemMessage:
+    """创建系统提示消息
+    
+    开启 LLM_CONFIG["prompt_cache_control"] 时以带 cache_control 的内容块发送，
+    让 Anthropic 或支持显式提示缓存的网关缓存静态的系统提示；
+    OpenAI 的前缀缓存是自动的，不需要这个标记，默认关闭。
+    
+    suffix 是会变化的补充内容（如当前时间），接在静态提示之后，
+    静态部分仍是逐字节稳定的前缀；开启 cache_control 时作为单独的内容块，不在缓存标记内。
+    """
+    if LLM_CONFIG["prompt_cache_control"]:
+        content = [{
+            "type": "text",
+            "text": text,
+            "cache_control": {"type": "ephemeral"},
+        }]
+        if suffix:
+            content.append({"type": "text", "text": suffix})
+        return SystemMessage(content=content)
+    if suffix:
+        return SystemMessage(content=f"{text}\n\n{suffix}")
+    return SystemMessage(content=text)
+
+
+class TimedSystemPrompt:
+    """带当前时间的系统提示（按分钟缓存）
+    
+    时间精确到分钟，同一分钟内的多轮调用复用同一个消息对象，
+    提示内容逐字节相同，也便于命中服务端的前缀缓存。
+    模板中可使用 {current_time}（YYYY-MM-DD HH:MM）和 {current_date} 占位符。
+    """
+    
+    def __init__(self, template: str, build=build_system_message):
+        self._template = template
+        self._build = build
+        self._cached = None  # (分钟序号, SystemMessage)
+    
+    def get(self) -> SystemMessage:
+        """获取当前分钟的系统提示"""
+        # 每轮只比较分钟序号；分钟变化时才格式化时间并创建新的消息
+        minute = int(time.time() // 60)
+        cached = self._cached
+        if cached is None or cached[0] != minute:
+            current_time = datetime.fromtimestamp(minute * 60).strftime("%Y-%m-%d %H:%M")
+            cached = (minute, self._build(self._template.format(
+                current_time=current_time,
+                current_date=current_time[:10]
+            )))
+            self._cached = cached
+        return cached[1]
+
+
+def trim_history(
+    messages: Sequence[BaseMessage],
+    max_messages: int = LLM_CONFIG["max_history_messages"]
+) -> Sequence[BaseMessage]:
+    """截取发送给 LLM 的最近对话历史
+    
+    只保留最近约 max_messages 条消息，并从用户消息处开始截取，
+    保证工具调用与工具结果成对出现；当前这一轮即使超出上限也完整保留。
+    对话状态本身不受影响。
+    """
+    if not max_messages or len(messages) <= max_messages:
+        return messages
+    
+    start = len(messages) - max_messages
+    while start > 0 and not isinstance(messages[start], HumanMessage):
+        start -= 1
+    return messages[start:]
+
+
+class LLMResponseCache:
+    """LLM 响应缓存（LRU）
+    
+    以完整的输入消息序列（类型、内容、工具调用）的哈希为键。
+    输入完全相同时直接复用上次的 AIMessage，省去一次 LLM 调用；
+    由于工具返回结果也在消息中，工具结果不同时不会命中。
+    """
+    
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def make_key(messages: Sequence[BaseMessage]) -> str:
+        """计算消息序列的缓存键"""
+        digest = hashlib.blake2b(digest_size=16)
+        for message in messages:
+            digest.update(orjson.dumps(
+                [
+                    message.type,
+                    message.content,
+                    getattr(message, "tool_calls", None),
+                    getattr(message, "tool_call_id", None),
+                ],
+                option=orjson.OPT_SORT_KEYS,
+                default=str,
+            ))
+        return digest.hexdigest()
+    
+    def get(self, key: str) -> Optional[AIMessage]:
+        """读取缓存，未命中返回 None"""
+        with self._lock:
+            message = self._data.get(key)
+            if message is None:
+                return None
+            self._data.move_to_end(key)
+        # 去掉消息 ID，避免 add_messages 把复用的消息当作同一条合并
+        return message.model_copy(update={"id": None})
+    
+    def set(self, key: str, message: AIMessage):
+        """写入缓存，超出容量时淘汰最久未使用的条目"""
+        with self._lock:
+            self._data[key] = message
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def cached_invoke(self, llm, messages: Sequence[BaseMessage]) -> AIMessage:
+        """调用 LLM（输入完全相同时复用缓存的响应，限流时自动重试）"""
+        key = self.make_key(messages)
+        response = self.get(key)
+        if response is None:
+            response = _retry(llm.invoke)(messages)
+            self.set(key, response)
+        else:
+            logger.debug("♻️  命中 LLM 响应缓存")
+        return response
+    
+    async def acached_invoke(self, llm, messages: Sequence[BaseMessage]) -> AIMessage:
+        """异步调用 LLM（输入完全相同时复用缓存的响应，限流时自动重试）"""
+        key = self.make_key(messages)
+        response = self.get(key)
+        if response is None:
+            response = await _retry(llm.ainvoke)(messages)
+            self.set(key, response)
+        else:
+            logger.debug("♻️  命中 LLM 响应缓存")
+        return response
@@ -0,0 +1,33 @@
+"""日志配置"""
+import logging
+import os
+import sys
+
+# 所有 src 模块的日志都挂在这个日志器下
+_ROOT_LOGGER_NAME = "src"
+_configured = False
+
+
+def _configure():
+    """配置 src 日志器（只执行一次）"""
+    global _configured
+    if _configured:
+        return
+    root = logging.getLogger(_ROOT_LOGGER_NAME)
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    root.addHandler(handler)
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    root.propagate = False
+    _configured = True
+
+
+def get_logger(name: str) -> logging.Logger:
+    """获取模块日志器
+    
+    日志级别由环境变量 LOG_LEVEL 控制（默认 INFO）：
+    INFO 输出各节点的关键步骤，DEBUG 额外输出工具参数、返回内容和路由判断，
+    WARNING 及以上则关闭过程日志。
+    """
+    _configure()
+    return logging.getLogger(name)
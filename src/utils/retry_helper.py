@@ -1,31 +1,91 @@
 """重试辅助函数"""
 import time
+import asyncio
+import random
 from functools import wraps
 
+from .logger import get_logger
 
-def retry_on_rate_limit(max_retries=3, delay=5):
-    """装饰器：在遇到 429 错误时自动重试
+logger = get_logger(__name__)
+
+
+def _is_retryable(error: Exception) -> bool:
+    """判断是否为可重试的错误（429 限流或连接类错误）"""
+    error_msg = str(error)
+    if "429" in error_msg or "rate limit" in error_msg.lower():
+        return True
+    return type(error).__name__ in ("RateLimitError", "APIConnectionError", "APITimeoutError")
+
+
+def _get_retry_after(error: Exception):
+    """读取响应头中的 Retry-After（秒），不存在时返回 None"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _compute_wait(error: Exception, attempt: int, delay, max_delay) -> float:
+    """计算第 attempt 次失败后的等待时间（优先使用 Retry-After）"""
+    wait_time = _get_retry_after(error)
+    if wait_time is None:
+        backoff = min(max_delay, delay * (2 ** attempt))
+        wait_time = random.uniform(backoff / 2, backoff)
+    return wait_time
+
+
+def _log_retry(error: Exception, wait_time: float, attempt: int, max_retries: int):
+    """记录一次重试（区分限流、连接失败和超时）"""
+    reason = "API 限流" if type(error).__name__ == "RateLimitError" or "429" in str(error) else "API 请求失败"
+    logger.warning("⚠️  遇到%s (%s)，等待 %.1f 秒后重试... (尝试 %d/%d)",
+                   reason, type(error).__name__, wait_time, attempt + 1, max_retries)
+
+
+def retry_on_rate_limit(max_retries=3, delay=5, max_delay=60):
+    """装饰器：在遇到 429 限流或连接错误时自动重试
+    
+    等待时间按指数退避并加入随机抖动（delay * 2^attempt，上限 max_delay），
+    若服务端返回了 Retry-After 则以其为准。同时支持普通函数和协程函数。
     
     Args:
         max_retries: 最大重试次数
-        delay: 每次重试的延迟（秒）
+        delay: 首次重试的基础延迟（秒）
+        max_delay: 单次等待的最大延迟（秒）
     """
     def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                for attempt in range(max_retries):
+                    try:
+                        return await func(*args, **kwargs)
+                    except Exception as e:
+                        if _is_retryable(e) and attempt < max_retries - 1:
+                            wait_time = _compute_wait(e, attempt, delay, max_delay)
+                            _log_retry(e, wait_time, attempt, max_retries)
+                            await asyncio.sleep(wait_time)
+                            continue
+                        raise
+                
+                raise Exception(f"重试 {max_retries} 次后仍然失败")
+            
+            return async_wrapper
+        
         @wraps(func)
         def wrapper(*args, **kwargs):
             for attempt in range(max_retries):
                 try:
                     return func(*args, **kwargs)
                 except Exception as e:
-                    error_msg = str(e)
-                    
-                    # 检查是否是 429 错误
-                    if "429" in error_msg or "rate limit" in error_msg.lower():
-                        if attempt < max_retries - 1:
-                            wait_time = delay * (attempt + 1)  # 递增延迟
-                            print(f"\n⚠️  遇到 API 限流，等待 {wait_time} 秒后重试... (尝试 {attempt + 1}/{max_retries})")
-                            time.sleep(wait_time)
-                            continue
+                    if _is_retryable(e) and attempt < max_retries - 1:
+                        wait_time = _compute_wait(e, attempt, delay, max_delay)
+                        _log_retry(e, wait_time, attempt, max_retries)
+                        time.sleep(wait_time)
+                        continue
                     
                     # 其他错误直接抛出
                     raise
@@ -52,3 +112,20 @@ def add_delay_between_calls(delay=2):
         
         return wrapper
     return decorator
+
+
+def wait_remaining(start_time, interval):
+    """等待至距 start_time 满 interval 秒，已超过则不等待
+    
+    Args:
+        start_time: 起始时刻（time.monotonic() 的返回值）
+        interval: 两次调用之间的最小间隔（秒）
+    
+    Returns:
+        实际等待的秒数
+    """
+    remaining = interval - (time.monotonic() - start_time)
+    if remaining > 0:
+        time.sleep(remaining)
+        return remaining
+    return 0
@@ -0,0 +1,48 @@
+"""流式输出辅助函数"""
+from typing import Any, AsyncIterator, Dict, Optional, Union
+
+
+async def astream_reply(
+    graph,
+    state: Dict[str, Any],
+    config: Optional[Dict[str, Any]] = None
+) -> AsyncIterator[Union[str, Dict[str, Any]]]:
+    """流式执行图，逐段产出回复文本，最后产出图的最终状态
+    
+    只转发本图 agent 节点的模型输出，工具内部子 Agent 的输出不会转发。
+    若最后一条回复没有经过流式生成（如命中响应缓存或直接采用子 Agent 回复，
+    即使此前 agent 节点已流式输出了调用工具前的说明文字），
+    在最终状态之前一次性产出完整回复。
+    
+    Yields:
+        回复文本片段（str），最后一项为图的最终状态（dict）
+    """
+    root_run_id = None
+    agent_run_ids = set()
+    streamed = False
+    result = None
+    
+    async for event in graph.astream_events(state, config, version="v2"):
+        kind = event["event"]
+        parent_ids = event.get("parent_ids", [])
+        
+        if root_run_id is None:
+            root_run_id = event["run_id"]
+        elif kind == "on_chain_start" and parent_ids == [root_run_id]:
+            # 新的节点开始执行：只关心最后一条回复是否已流式产出。
+            # tools 节点也要重置，它可能追加子 Agent 的直通回复，
+            # 此前 agent 节点流式输出的只是调用工具前的说明文字
+            streamed = False
+            if event["name"] == "agent":
+                agent_run_ids.add(event["run_id"])
+        elif kind == "on_chat_model_stream" and len(parent_ids) > 1 and parent_ids[1] in agent_run_ids:
+            content = event["data"]["chunk"].content
+            if content:
+                streamed = True
+                yield content
+        elif kind == "on_chain_end" and event["run_id"] == root_run_id:
+            result = event["data"]["output"]
+    
+    if not streamed:
+        yield result["messages"][-1].content
+    yield result
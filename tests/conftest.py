@@ -0,0 +1,60 @@
+"""pytest 配置：让测试可以从仓库根目录导入 src 和 config"""
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 构造 ChatOpenAI 需要 API Key；测试不会真正发出 LLM 请求
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+os.environ.setdefault("API_KEY", "test-key")
+
+
+class _FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """对所有 chat/completions 请求返回一条不含工具调用的固定回复，并记录请求体"""
+    protocol_version = "HTTP/1.1"  # keep-alive：连接会进入客户端连接池
+
+    def do_POST(self):
+        self.server.requests.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+        body = json.dumps({
+            "id": "chatcmpl-test",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "test-model",
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": "好的"},
+            }],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    """本地的 OpenAI 兼容服务（不访问外网），server.requests 为收到的请求体"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeOpenAIHandler)
+    server.requests = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}/v1"
+    # SchedulerAgent 和 SummaryAgent 读取的环境变量名不同
+    monkeypatch.setenv("MODEL_NAME", "test-model")
+    monkeypatch.setenv("API_KEY", "test-key")
+    monkeypatch.setenv("BASE_URL", base_url)
+    monkeypatch.setenv("OPENAI_MODEL", "test-model")
+    monkeypatch.setenv("OPENAI_API_BASE", base_url)
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,31 @@
+"""批量处理测试（使用本地的 OpenAI 兼容服务，不访问外网）"""
+from unittest import mock
+
+import pytest
+
+from src.agents import scheduler
+from src.utils import llm
+
+
+def test_process_batch_twice(fake_openai):
+    """连续两次 process_batch（两个 asyncio.run）都能成功，不复用已关闭循环的连接，
+    每次结束时关闭本次循环建立的连接"""
+    with mock.patch.object(scheduler, "get_scheduler_agent", return_value=scheduler.SchedulerAgent()):
+        runner = scheduler.SchedulerAgentRunner()
+
+    # 输入互不相同，避免命中 LLM 响应缓存而不发出请求
+    first = runner.process_batch(["查询今天的日程", "查询明天的日程"])
+    second = runner.process_batch(["查询后天的日程"])
+
+    assert [result["status"] for result in first + second] == ["success"] * 3
+    assert [result["response"] for result in first + second] == ["好的"] * 3
+    assert len(llm._get_async_transport()._loop_transports) == 0
+
+
+
+def test_rate_limiter_starts_full():
+    """主动限流器启动时令牌桶是满的：前 max_burst 次调用不等待"""
+    limiter = llm._get_rate_limiter.__wrapped__()  # 新建实例，不影响共享的限流器
+    if limiter is None:
+        pytest.skip("主动限流已关闭")
+    assert all(limiter.acquire(blocking=False) for _ in range(int(limiter.max_bucket_size)))
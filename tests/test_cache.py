@@ -0,0 +1,45 @@
+"""ToolResultCache 测试"""
+import sqlite3
+
+from src.storage import database
+from src.utils.cache import ToolResultCache
+
+
+def test_cache_cleared_when_data_version_changes():
+    """底层数据版本变化（其他进程写入）时，已缓存的结果不再返回"""
+    version = [0]
+    calls = []
+    cache = ToolResultCache(ttl=600, data_version=lambda: version[0])
+
+    @cache.cached
+    def list_events():
+        calls.append(1)
+        return {"status": "success", "events": len(calls)}
+
+    assert list_events()["events"] == 1
+    assert list_events()["events"] == 1
+    generation = cache.generation
+
+    version[0] += 1
+    assert cache.generation == generation + 1
+    assert list_events()["events"] == 2
+    assert len(calls) == 2
+
+
+def test_database_data_version_tracks_commits(tmp_path, monkeypatch):
+    """其他连接提交写入后数据库的版本标识随之变化，只读查询不改变它"""
+    db_path = str(tmp_path / "scheduler.db")
+    monkeypatch.setattr(database, "DB_PATH", db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE events (id INTEGER PRIMARY KEY, title TEXT)")
+    conn.commit()
+
+    before = database.data_version()
+    conn.execute("SELECT count(*) FROM events").fetchone()
+    assert database.data_version() == before
+
+    conn.execute("INSERT INTO events (title) VALUES ('团队会议')")
+    conn.commit()
+    assert database.data_version() != before
+    conn.close()
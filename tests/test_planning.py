@@ -0,0 +1,117 @@
+"""PlanningAgent 测试（子 Agent 以桩对象替代，不调用 LLM）"""
+import asyncio
+from unittest import mock
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.graph import StateGraph, END
+
+from src.agents import scheduler as scheduler_module
+from src.agents.planning import get_planning_agent, match_fast_path
+from src.graph.state import AgentState
+from src.utils.json_helper import decode_tool_content
+
+
+class FakeSubAgent:
+    """模拟子 Agent：返回值与真实 Agent 的 _build_response 结构相同（含消息对象）"""
+
+    def __init__(self, response="已添加事件：团队会议", status="success"):
+        self.response = response
+        self.status = status
+        self.requests = []
+
+    def _result(self, request):
+        self.requests.append(request)
+        return {
+            "status": self.status,
+            "response": self.response,
+            "messages": [HumanMessage(content=request), AIMessage(content=self.response)],
+        }
+
+    def process(self, request):
+        return self._result(request)
+
+    async def aprocess(self, request):
+        return self._result(request)
+
+
+@pytest.fixture
+def scheduler():
+    fake = FakeSubAgent()
+    with mock.patch.object(scheduler_module, "get_scheduler_agent", return_value=fake):
+        yield fake
+
+
+def _tool_contents(result: dict) -> list:
+    return [decode_tool_content(msg.content) for msg in result["messages"] if isinstance(msg, ToolMessage)]
+
+
+def test_sub_agent_reply_passes_through(scheduler):
+    """快速路径 -> 真实 ToolNode -> 直通回复：工具结果是 JSON，最终回复就是子 Agent 的回复"""
+    user_input = "添加明天上午9点的团队会议"
+    result = get_planning_agent().graph.invoke({"messages": [HumanMessage(content=user_input)]})
+
+    assert _tool_contents(result) == [{
+        "status": "success",
+        "agent": "SchedulerAgent",
+        "response": "已添加事件：团队会议",
+    }]
+    assert scheduler.requests == [user_input]
+    assert isinstance(result["messages"][-1], AIMessage)
+    assert result["messages"][-1].content == "已添加事件：团队会议"
+
+
+def test_sub_agent_reply_passes_through_async(scheduler):
+    """异步执行同样走直通回复"""
+    user_input = "查询明天的日程"
+    result = asyncio.run(get_planning_agent().graph.ainvoke({"messages": [HumanMessage(content=user_input)]}))
+
+    assert _tool_contents(result)[0]["status"] == "success"
+    assert result["messages"][-1].content == "已添加事件：团队会议"
+
+
+def test_failed_sub_agent_is_not_passed_through(scheduler):
+    """子 Agent 处理失败时工具状态为 error，不直接作为最终回复"""
+    scheduler.status = "error"
+    state = {"messages": [
+        HumanMessage(content="添加明天上午9点的团队会议"),
+        AIMessage(content="", tool_calls=[{
+            "name": "call_scheduler_agent",
+            "args": {"request": "添加明天上午9点的团队会议"},
+            "id": "call_1",
+        }]),
+    ]}
+
+    # 只运行 PlanningAgent 的工具节点（回到 agent 节点会调用 LLM）
+    workflow = StateGraph(AgentState)
+    workflow.add_node("tools", get_planning_agent().graph.builder.nodes["tools"].runnable)
+    workflow.set_entry_point("tools")
+    workflow.add_edge("tools", END)
+    result = workflow.compile().invoke(state)
+
+    assert [content["status"] for content in _tool_contents(result)] == ["error"]
+    assert isinstance(result["messages"][-1], ToolMessage)
+
+
+@pytest.mark.parametrize("user_input, expected", [
+    ("添加明天上午9点的团队会议", "call_scheduler_agent"),
+    ("查询明天的日程", "call_scheduler_agent"),
+    ("总结一下本周的日程安排", "call_summary_agent"),
+    ("查看我的偏好", "get_preferences"),
+    # 混合意图：需要 LLM 拆分为多个工具调用
+    ("添加明天的会议，再总结一下上周", None),
+    ("添加明天的会议再总结一下上周", None),
+    ("查询上周的统计分析", None),
+    ("删除明天的会议并添加后天的会议", None),
+    ("总结本周日程然后添加下周的会议", None),
+    # 以“查询”开头的总结分析类请求
+    ("查询本周时间使用情况", None),
+    ("查询我这周的时间分配", None),
+    ("查询一下上周的效率", None),
+    ("查询上周开了多少次会", None),
+    # 偏好和规划类请求
+    ("添加一个我喜欢的时间段", None),
+    ("帮我规划下周的学习计划", None),
+])
+def test_match_fast_path(user_input, expected):
+    assert match_fast_path(user_input) == expected
@@ -0,0 +1,48 @@
+"""retry_on_rate_limit 测试"""
+import logging
+
+import pytest
+
+from src.utils.retry_helper import retry_on_rate_limit
+
+
+class APIConnectionError(Exception):
+    """与 openai.APIConnectionError 同名的桩异常"""
+
+
+def test_retry_logs_real_error_type(caplog):
+    """连接错误重试时日志写明真实的异常类型，而不是"限流" """
+    calls = []
+
+    @retry_on_rate_limit(max_retries=2, delay=0)
+    def flaky():
+        calls.append(1)
+        if len(calls) == 1:
+            raise APIConnectionError("Connection error.")
+        return "ok"
+
+    logger = logging.getLogger("src")
+    logger.addHandler(caplog.handler)
+    try:
+        assert flaky() == "ok"
+    finally:
+        logger.removeHandler(caplog.handler)
+
+    assert len(calls) == 2
+    assert len(caplog.records) == 1
+    message = caplog.records[0].getMessage()
+    assert "APIConnectionError" in message
+    assert "限流" not in message
+
+
+def test_non_retryable_error_is_raised():
+    calls = []
+
+    @retry_on_rate_limit(max_retries=3, delay=0)
+    def broken():
+        calls.append(1)
+        raise ValueError("bad input")
+
+    with pytest.raises(ValueError):
+        broken()
+    assert len(calls) == 1
@@ -0,0 +1,72 @@
+"""astream_reply 测试（以假模型流式输出，不调用 LLM）"""
+import asyncio
+from typing import Literal
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.graph import StateGraph, END
+
+from src.graph.state import AgentState
+from src.utils.streaming import astream_reply
+
+
+def _build_graph(narration: str, pass_through: bool):
+    """agent 节点流式输出 narration 并调用子 Agent 工具；
+    tools 节点按 pass_through 追加直通回复或回到 agent 节点"""
+    model = GenericFakeChatModel(messages=iter([
+        AIMessage(content=narration),
+        AIMessage(content="已为你添加 团队会议"),
+    ]))
+
+    async def agent(state: AgentState):
+        response = await model.ainvoke(state["messages"])
+        if any(isinstance(msg, ToolMessage) for msg in state["messages"]):
+            return {"messages": [AIMessage(content=response.content)]}
+        return {"messages": [AIMessage(content=response.content, tool_calls=[{
+            "name": "call_scheduler_agent",
+            "args": {"request": state["messages"][0].content},
+            "id": "call_1",
+        }])]}
+
+    async def tools(state: AgentState):
+        messages = [ToolMessage(content='{"status": "success"}', tool_call_id="call_1")]
+        if pass_through:
+            messages.append(AIMessage(content="已添加事件：团队会议"))
+        return {"messages": messages}
+
+    def should_continue(state: AgentState) -> Literal["tools", "end"]:
+        return "tools" if state["messages"][-1].tool_calls else "end"
+
+    def after_tools(state: AgentState) -> Literal["agent", "end"]:
+        return "end" if isinstance(state["messages"][-1], AIMessage) else "agent"
+
+    workflow = StateGraph(AgentState)
+    workflow.add_node("agent", agent)
+    workflow.add_node("tools", tools)
+    workflow.set_entry_point("agent")
+    workflow.add_conditional_edges("agent", should_continue, {"tools": "tools", "end": END})
+    workflow.add_conditional_edges("tools", after_tools, {"agent": "agent", "end": END})
+    return workflow.compile()
+
+
+def _collect(graph) -> tuple:
+    async def run():
+        items = [item async for item in astream_reply(graph, {"messages": [HumanMessage(content="添加明天的团队会议")]})]
+        return "".join(items[:-1]), items[-1]
+    return asyncio.run(run())
+
+
+def test_narration_then_pass_through_reply():
+    """说明文字 + 子 Agent 调用 -> 直通回复：直通回复也要产出"""
+    text, result = _collect(_build_graph("好的，我来 添加", pass_through=True))
+
+    assert text == "好的，我来 添加已添加事件：团队会议"
+    assert result["messages"][-1].content == "已添加事件：团队会议"
+
+
+def test_streamed_final_reply_is_not_repeated():
+    """最后一轮 agent 已流式输出的回复不再重复产出"""
+    text, result = _collect(_build_graph("好的", pass_through=False))
+
+    assert text == "好的已为你添加 团队会议"
+    assert result["messages"][-1].content == "已为你添加 团队会议"
@@ -0,0 +1,13 @@
+"""SummaryAgent 测试（使用本地的 OpenAI 兼容服务，不访问外网）"""
+from src.agents.summary import SummaryAgent
+
+
+def test_time_context_is_in_the_leading_system_message(fake_openai):
+    """时间上下文在开头唯一的系统消息中，不在对话末尾追加系统消息"""
+    result = SummaryAgent().process("总结一下最近的日程安排")
+
+    assert result["status"] == "success"
+    messages = fake_openai.requests[0]["messages"]
+    assert [message["role"] for message in messages] == ["system", "user"]
+    assert messages[0]["content"].startswith("您是专门处理日程总结和分析的助理。")
+    assert "当前时间: " in messages[0]["content"]
@@ -0,0 +1,30 @@
+"""工具函数测试"""
+from datetime import datetime
+
+import pytest
+
+from src.tools.scheduler_agent_tools import parse_datetime
+
+
+@pytest.mark.parametrize("dt_str, expected", [
+    ("2025-10-22", datetime(2025, 10, 22)),
+    ("2025-10-22 09:00", datetime(2025, 10, 22, 9, 0)),
+    ("2025-10-22T09:00", datetime(2025, 10, 22, 9, 0)),
+    ("2025-10-22T09:00:30", datetime(2025, 10, 22, 9, 0, 30)),
+])
+def test_parse_datetime(dt_str, expected):
+    result = parse_datetime(dt_str)
+    assert result == expected
+    assert result.tzinfo is None
+
+
+@pytest.mark.parametrize("dt_str", [
+    "2025-10-22 09:00+08",   # 带时区偏移：与数据库中的无时区时间无法比较
+    "2025-10-22T09:00Z",
+    "2025-W43-3",            # ISO 周日期
+    "2025-10-22x09:00",
+    "明天上午9点",
+])
+def test_parse_datetime_rejects_unsupported_formats(dt_str):
+    with pytest.raises(ValueError):
+        parse_datetime(dt_str)